@@ -1,32 +1,195 @@
 # app.py
-import time, json
+import os
+import pandas as pd
 import streamlit as st
-import streamlit.components.v1 as components
-from string import Template
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from util.motor import Partida
+from util import entrosamento, estaticos, exportacao
+from util.cronometro import cronometro_partida
+from util.graficos import graficos_minutos
+from util import relogio
+from util.relogio import formato_mmss
+from util import diario
+from util.banco import BancoPartidas, DiarioBanco
+from util.espectadores import QuadroEspectadores
+from util.perfil import PerfilRerun
+from util.relatorio import avancar_tabela, tabela_tempos
+
+# quando este rerun começou no relógio do servidor (resposta à sincronia do cronômetro)
+INICIO_RERUN = relogio.agora()
+
+# Caminho de uma base SQLite compartilhada liga o modo multi-partidas (várias quadras)
+BANCO = os.environ.get("HANDEBOL_BANCO")
+
+@st.cache_resource
+def _banco(caminho: str) -> BancoPartidas:
+    return BancoPartidas(caminho)  # um pool por servidor, não por sessão
+
+def _seletor_partida(banco: BancoPartidas):
+    """Barra lateral: escolhe (ou cria) a partida desta sessão; devolve o id."""
+    with st.sidebar:
+        st.markdown("### 🏟️ Partida")
+        nome = st.text_input("Nova partida", key="partida_nova", placeholder="Ex.: Quadra 2 — Sub-14")
+        if st.button("Criar partida", key="partida_criar", disabled=not nome.strip()):
+            st.session_state["partida_sel"] = banco.criar_partida(nome.strip())
+        partidas = dict(banco.partidas())
+        if not partidas:
+            st.info("Crie a primeira partida.")
+            st.stop()
+        return st.selectbox("Partida", list(partidas), format_func=lambda i: f"#{i} — {partidas[i]}", key="partida_sel")
+
+# Estilos em static/estilos.css (baixados uma vez) e HTML repetido em moldes
+# formatados uma vez no import: cada rerun só preenche dados.
+st.markdown(estaticos.folha_estilos(servido=st.get_option("server.enableStaticServing")), unsafe_allow_html=True)
+CABECALHO_EQUIPE = "<div class='team-head' style='background:{cor};'>{nome}</div>".format
+CHIP_QUADRA = "<span class='chip chip-quadra' title='Jogando'>#{}</span>".format
+CHIP_EXCLUIDO = "<span class='chip chip-inelegivel' title='Cumprindo 2 minutos'>#{}</span>".format
+CHIPS_TROCA = "<span class='chip chip-sai'>Sai {sai}</span><span class='chip chip-ent'>Entra {entra}</span>".format
+
+@st.cache_resource
+def _quadro() -> QuadroEspectadores:
+    return QuadroEspectadores()  # um por servidor: operador publica, espectadores leem
+
+ATUALIZA_ESPECTADOR = 15.0  # s entre tabelas do espectador com o relógio rodando
+
+# =====================================================
+# 👀 Vista do espectador (?espectador=1&partida=<id>) — somente leitura
+# =====================================================
+def _vista_espectador(partida: str):
+    versao, r = _quadro().ler(partida)
+    st.session_state["_versao_espectador"] = versao
+
+    st.session_state["_render_espectador"] = relogio.agora()
+
+    @st.fragment(run_every=1.0)
+    def _vigiar_versao():
+        # a cada segundo só compara a versão; o quadro é reenviado quando ela muda
+        # (e, com o relógio rodando, a cada ATUALIZA_ESPECTADOR s para os minutos)
+        v, atual = _quadro().ler(partida)
+        rodando = atual is not None and atual["relogio"]["iniciado"]
+        if v != st.session_state["_versao_espectador"] or (
+            rodando and relogio.agora() - st.session_state["_render_espectador"] >= ATUALIZA_ESPECTADOR
+        ):
+            st.rerun()
+
+    _vigiar_versao()
+    if r is None:
+        st.info("Aguardando o operador da partida…")
+        return
+    # retrato pronto (tabela e chips já montados pelo operador): só reemite;
+    # o relógio anda sozinho no componente entre uma versão e outra
+    rel = r["relogio"]
+    cronometro_partida(
+        rel["iniciado"], rel["base_elapsed"], rel["start_epoch"], r["equipes"],
+        key="cronometro_espectador", fim_periodo=rel["fim_periodo"],
+    )
+    cols = st.columns(2)
+    for eq, col in zip(("A", "B"), cols):
+        with col:
+            st.markdown(CABECALHO_EQUIPE(cor=r["cores"][eq], nome=r["nomes"][eq]), unsafe_allow_html=True)
+            st.markdown(r["chips"][eq] or "<div class='chips-line'>—</div>", unsafe_allow_html=True)
+    if not r["stats"].empty:
+        # minutos ao vivo a partir do relógio publicado (o retrato só muda com eventos)
+        agora = rel["base_elapsed"] + (relogio.agora() - rel["start_epoch"] if rel["iniciado"] else 0.0)
+        st.dataframe(
+            avancar_tabela(r["stats"], agora - r["tempo"], r["periodo"], r["restante_2min"]),
+            use_container_width=True, hide_index=True,
+        )
+    st.caption(f"Versão {versao}")
+
+if st.query_params.get("espectador"):
+    _vista_espectador(st.query_params.get("partida", "local"))
+    st.stop()
+
+if BANCO:
+    partida_id = _seletor_partida(_banco(BANCO))
+    if st.session_state.get("partida_id") != partida_id:
+        # troca de partida: descarta o estado da anterior (menos os widgets da barra lateral)
+        for k in list(st.session_state):
+            if k not in ("partida_sel", "partida_nova"):
+                del st.session_state[k]
+        st.session_state["partida_id"] = partida_id
+
+# =====================================================
+# 🩺 Perfil de rerun (opcional): começa a medir o quanto antes
+# =====================================================
+if "perfil" not in st.session_state:
+    st.session_state["perfil"] = PerfilRerun()
+perfil = st.session_state["perfil"]
+perfil.ativo = st.sidebar.toggle("🩺 Perfil de rerun", key="perfil_ativo", help="Cronometra as seções de cada rerun.")
+perfil.inicio_rerun()
+
+def secao(nome: str):
+    """Bloco cronometrado pelo perfil de rerun (não mede nada com o perfil desligado)."""
+    return st.session_state["perfil"].secao(nome)
 
 # =====================================================
 # 🔧 Inicialização de estado global
 # =====================================================
-if "equipes" not in st.session_state:
-    st.session_state["equipes"] = {"A": [], "B": []}
-if "cores" not in st.session_state:
-    st.session_state["cores"] = {"A": "#00AEEF", "B": "#EC008C"}
-if "titulares_definidos" not in st.session_state:
-    st.session_state["titulares_definidos"] = {"A": False, "B": False}
-if "nome_A" not in st.session_state:
-    st.session_state["nome_A"] = "Equipe A"
-if "nome_B" not in st.session_state:
-    st.session_state["nome_B"] = "Equipe B"
+def _alarme_penalidade(p: dict):
+    """Callback da agenda: enfileira o alarme de fim dos 2' para este rerun."""
+    st.session_state.setdefault("alarmes", []).append(p)
+
+# seleções da aba de controle que espelham o estado da partida
+WIDGETS_CONTROLE = ["sel_periodo"] + [
+    f"{w}_{eq}" for eq in ("A", "B") for w in ("sai", "entra", "doismin_sel", "comp_sel", "exp_sel")
+]
+
+def _sincronizar_widgets(partida: Partida):
+    """Depois de reproduzir registros (diário, outro operador, desfazer): os widgets refletem a partida."""
+    for k in WIDGETS_CONTROLE:
+        st.session_state.pop(k, None)  # voltam ao valor inicial, calculado da partida
+    for eq in ("A", "B"):
+        st.session_state[f"nome_{eq}"] = partida.nomes[eq]
+        st.session_state[f"cor_{eq}"] = partida.cores[eq]
+        numeros = [j["numero"] for j in partida.equipes.jogadores(eq)]
+        if numeros:
+            st.session_state[f"numeros_{eq}"] = numeros
+
+if "partida" not in st.session_state:
+    # motor da partida (util/motor.py); o diário refaz o estado após refresh ou queda do servidor
+    partida = Partida()
+    if BANCO:
+        partida.diario = DiarioBanco(_banco(BANCO), st.session_state["partida_id"])
+        partida.diario.atualizar(partida)
+    else:
+        caminho = diario.ultimo_diario() or diario.novo_caminho()
+        if os.path.exists(caminho):
+            diario.reproduzir(partida, caminho)
+        partida.diario = diario.DiarioPartida(caminho)
+    partida.ao_vencer(_alarme_penalidade)  # depois da reprodução: sem alarmes antigos
+    st.session_state["partida"] = partida
+    _sincronizar_widgets(partida)
+elif BANCO:
+    # outros operadores da mesma partida: aplica só o que chegou desde o último rerun
+    if st.session_state["partida"].diario.atualizar(st.session_state["partida"]):
+        _sincronizar_widgets(st.session_state["partida"])
+partida = st.session_state["partida"]
+if getattr(partida.diario, "assumido", False):
+    # outra aba/sessão abriu este diário (util/diario.py): só ela escreve nele
+    st.warning("Esta partida foi aberta em outra aba. Recarregue a página para continuar por aqui.")
+    st.stop()
+
+if "invert_lados" not in st.session_state:
+    st.session_state["invert_lados"] = False
+if "alarmes" not in st.session_state:
+    st.session_state["alarmes"] = []
+# nomes e cores são chave de widget da aba 1: reatribuir evita que o Streamlit
+# os descarte nos reruns em que essa aba não é renderizada
+for _eq in ("A", "B"):
+    st.session_state[f"nome_{_eq}"] = st.session_state.get(f"nome_{_eq}", partida.nomes[_eq])
+    st.session_state[f"cor_{_eq}"] = st.session_state.get(f"cor_{_eq}", partida.cores[_eq])
+
+st.sidebar.caption(f"👀 Espectadores: abra esta página com `?espectador=1&partida={st.session_state.get('partida_id', 'local')}`")
 
 # =====================================================
 # 🧭 Abas
 # =====================================================
-abas = st.tabs([
-    "Configuração da Equipe",
-    "Definir Titulares",
-    "Controle do Jogo",
-    "Visualização de Dados"
-])
+ABAS = ["Configuração da Equipe", "Definir Titulares", "Controle do Jogo", "Visualização de Dados"]
+
+# Navegação no lugar de st.tabs: só a seção visível executa neste rerun;
+# as outras ficam paradas até serem abertas (os tempos saem da linha do tempo).
+aba = st.radio("Aba", ABAS, horizontal=True, key="aba_ativa", label_visibility="collapsed")
 
 # =====================================================
 # Helpers básicos compartilhados
@@ -35,268 +198,190 @@ def get_team_name(eq: str) -> str:
     """Nome configurado da equipe (A/B), com fallback."""
     return st.session_state.get(f"nome_{eq}") or f"Equipe {eq}"
 
-def atualizar_estado(eq: str, numero: int, novo_estado: str) -> bool:
-    """Muda o estado do jogador (jogando|banco|excluido|expulso)."""
-    for j in st.session_state["equipes"][eq]:
-        if int(j["numero"]) == int(numero):
-            j["estado"] = novo_estado
-            return True
-    return False
-
 def jogadores_por_estado(eq: str, estado: str):
     """Lista de jogadores elegíveis (não-expulsos) no estado informado."""
-    return [
-        int(j["numero"])
-        for j in st.session_state["equipes"][eq]
-        if j.get("elegivel", True) and j.get("estado") == estado
-    ]
+    return partida.numeros_por_estado(eq, estado)
 
 def elenco(eq: str):
     """Todos os jogadores elegíveis (não-expulsos)."""
-    return [
-        int(j["numero"])
-        for j in st.session_state["equipes"][eq]
-        if j.get("elegivel", True)
-    ]
+    return partida.elenco(eq)
+
+def tempo_logico_atual() -> float:
+    """Relógio de jogo (s): acumulado + trecho corrente se estiver rodando."""
+    return partida.tempo()
+
+def chips_quadra(eq: str) -> str:
+    """HTML da linha com quem está em quadra (jogando) e quem está nos 2' (cinza); '' se ninguém."""
+    chips = [CHIP_QUADRA(n) for n in sorted(jogadores_por_estado(eq, "jogando"))]
+    chips += [CHIP_EXCLUIDO(n) for n in sorted(jogadores_por_estado(eq, "excluido"))]
+    return f"<div class='chips-line'>{''.join(chips)}</div>" if chips else ""
+
+def _id_partida() -> str:
+    """Id da partida: o do banco compartilhado ou o nome do diário (partida_AAAAMMDD_HHMMSS)."""
+    if BANCO:
+        return str(st.session_state["partida_id"])
+    return os.path.splitext(os.path.basename(partida.diario.caminho))[0]
+
+def nova_partida():
+    """Fecha o diário atual, abre um novo e limpa o estado da sessão."""
+    nova = Partida(diario=diario.DiarioPartida(diario.novo_caminho()))
+    nova.ao_vencer(_alarme_penalidade)
+    partida.diario.fechar()
+    for k in list(st.session_state):
+        del st.session_state[k]
+    st.session_state["partida"] = nova
 
 
 # =====================================================
 # ABA 1 — CONFIGURAÇÃO DA EQUIPE
 # =====================================================
-with abas[0]:
-    st.subheader("Configuração da Equipe")
-
-    def ensure_num_list(team_key: str, qtd: int):
-        """Garante uma lista editável de números por equipe de tamanho 'qtd'."""
-        list_key = f"numeros_{team_key}"
-        if list_key not in st.session_state:
-            st.session_state[list_key] = [i + 1 for i in range(qtd)]
-        else:
-            nums = st.session_state[list_key]
-            if len(nums) < qtd:
-                nums.extend(list(range(len(nums) + 1, qtd + 1)))
-            elif len(nums) > qtd:
-                st.session_state[list_key] = nums[:qtd]
-
-    colA, colB = st.columns(2)
-    for eq, col in zip(["A", "B"], [colA, colB]):
-        with col:
-            st.markdown(f"### {get_team_name(eq)}")
-
-            nome = st.text_input(f"Nome da equipe {eq}", key=f"nome_{eq}")
-            qtd = st.number_input(
-                f"Quantidade de jogadores ({eq})",
-                min_value=1, max_value=20, step=1,
-                value=len(st.session_state["equipes"][eq]) or 7,
-                key=f"qtd_{eq}"
-            )
-
-            ensure_num_list(eq, int(qtd))
-
-            st.markdown("**Números das camisetas:**")
-            cols = st.columns(5)
-            for i, num in enumerate(st.session_state[f"numeros_{eq}"]):
-                with cols[i % 5]:
-                    novo = st.number_input(
-                        f"Jogador {i+1}",
-                        min_value=0, max_value=999, step=1,
-                        value=int(num),
-                        key=f"{eq}_num_{i}"
-                    )
-                    st.session_state[f"numeros_{eq}"][i] = int(novo)
+if aba == ABAS[0]:
+    with secao("aba 1: configuração"):
+        st.subheader("Configuração da Equipe")
+
+        if not BANCO and st.button("🆕 Nova partida", key="nova_partida", help="Começa um diário novo; a partida atual fica salva em disco."):
+            nova_partida()
+            st.rerun()
+
+        def ensure_num_list(team_key: str, qtd: int):
+            """Garante uma lista editável de números por equipe de tamanho 'qtd'."""
+            list_key = f"numeros_{team_key}"
+            if list_key not in st.session_state:
+                st.session_state[list_key] = [i + 1 for i in range(qtd)]
+            else:
+                nums = st.session_state[list_key]
+                if len(nums) < qtd:
+                    nums.extend(list(range(len(nums) + 1, qtd + 1)))
+                elif len(nums) > qtd:
+                    st.session_state[list_key] = nums[:qtd]
+
+        colA, colB = st.columns(2)
+        for eq, col in zip(["A", "B"], [colA, colB]):
+            with col:
+                st.markdown(f"### {get_team_name(eq)}")
+
+                nome = st.text_input(f"Nome da equipe {eq}", key=f"nome_{eq}")
+                qtd = st.number_input(
+                    f"Quantidade de jogadores ({eq})",
+                    min_value=1, max_value=20, step=1,
+                    value=len(partida.equipes.jogadores(eq)) or 7,
+                    key=f"qtd_{eq}"
+                )
 
-            cor = st.color_picker(
-                f"Cor da equipe {eq}",
-                value=st.session_state["cores"][eq],
-                key=f"cor_{eq}"
-            )
-            st.session_state["cores"][eq] = cor
+                ensure_num_list(eq, int(qtd))
+
+                st.markdown("**Números das camisetas:**")
+                cols = st.columns(5)
+                for i, num in enumerate(st.session_state[f"numeros_{eq}"]):
+                    with cols[i % 5]:
+                        novo = st.number_input(
+                            f"Jogador {i+1}",
+                            min_value=0, max_value=999, step=1,
+                            value=int(num),
+                            key=f"{eq}_num_{i}"
+                        )
+                        st.session_state[f"numeros_{eq}"][i] = int(novo)
+
+                # só uma cor nova vira registro (diário, desfazer, outros operadores)
+                cor = st.color_picker(
+                    f"Cor da equipe {eq}",
+                    key=f"cor_{eq}",
+                    on_change=lambda eq=eq: partida.definir_cor(eq, st.session_state[f"cor_{eq}"]),
+                )
 
-            if st.button(f"Salvar equipe {eq}", key=f"save_team_{eq}"):
-                numeros = list(dict.fromkeys(st.session_state[f"numeros_{eq}"]))  # sem duplicatas
-                st.session_state["equipes"][eq] = [
-                    {"numero": int(n), "estado": "banco", "elegivel": True, "exclusoes": 0}
-                    for n in numeros
-                ]
-                st.success(f"Equipe {eq} salva com {len(numeros)} jogadores.")
-                st.session_state["titulares_definidos"][eq] = False
+                if st.button(f"Salvar equipe {eq}", key=f"save_team_{eq}"):
+                    numeros = partida.definir_equipe(eq, st.session_state[f"numeros_{eq}"], nome=nome, cor=cor)  # sem duplicatas
+                    st.success(f"Equipe {eq} salva com {len(numeros)} jogadores.")
 
 
 # =====================================================
 # ABA 2 — DEFINIR TITULARES
 # =====================================================
-with abas[1]:
-    st.subheader("Definir Titulares")
-
-    for eq in ["A", "B"]:
-        st.markdown(f"### {get_team_name(eq)}")
-
-        jogadores = st.session_state["equipes"][eq]
-        if not jogadores:
-            st.info(f"Cadastre primeiro a {get_team_name(eq)} na aba anterior.")
-            continue
-
-        numeros = [j["numero"] for j in jogadores]
-
-        disabled = bool(st.session_state["titulares_definidos"][eq])
-        if disabled:
-            st.success("Titulares já registrados. Clique em **Corrigir** para editar.")
-
-        tit_key = f"titulares_sel_{eq}"
-        titulares_sel = st.multiselect(
-            "Selecione titulares (adicione um a um)",
-            options=numeros,
-            default=[j["numero"] for j in jogadores if j.get("estado") == "jogando"],
-            key=tit_key,
-            disabled=disabled
-        )
+if aba == ABAS[1]:
+    with secao("aba 2: titulares"):
+        st.subheader("Definir Titulares")
+
+        for eq in ["A", "B"]:
+            st.markdown(f"### {get_team_name(eq)}")
 
-        c1, c2 = st.columns(2)
-        with c1:
-            if st.button(f"Registrar titulares ({eq})", key=f"registrar_tit_{eq}", disabled=disabled):
-                if not titulares_sel:
-                    st.error("Selecione pelo menos 1 titular.")
-                else:
-                    sel = set(map(int, titulares_sel))
-                    for j in st.session_state["equipes"][eq]:
-                        j["estado"] = "jogando" if j["numero"] in sel else "banco"
-                        j["elegivel"] = True
-                    st.session_state["titulares_definidos"][eq] = True
-                    st.success(f"Titulares de {get_team_name(eq)} registrados.")
-        with c2:
-            if st.button(f"Corrigir ({eq})", key=f"corrigir_tit_{eq}"):
-                st.session_state["titulares_definidos"][eq] = False
-                st.info("Edição de titulares liberada.")
+            jogadores = partida.equipes.jogadores(eq)
+            if not jogadores:
+                st.info(f"Cadastre primeiro a {get_team_name(eq)} na aba anterior.")
+                continue
+
+            numeros = [j["numero"] for j in jogadores]
+
+            disabled = bool(partida.titulares_definidos[eq])
+            if disabled:
+                st.success("Titulares já registrados. Clique em **Corrigir** para editar.")
+
+            tit_key = f"titulares_sel_{eq}"
+            titulares_sel = st.multiselect(
+                "Selecione titulares (adicione um a um)",
+                options=numeros,
+                default=[j["numero"] for j in jogadores if j.get("estado") == "jogando"],
+                key=tit_key,
+                disabled=disabled
+            )
+
+            c1, c2 = st.columns(2)
+            with c1:
+                if st.button(f"Registrar titulares ({eq})", key=f"registrar_tit_{eq}", disabled=disabled):
+                    ok, msg = partida.definir_titulares(eq, titulares_sel)
+                    (st.success if ok else st.error)(msg)
+            with c2:
+                if st.button(f"Corrigir ({eq})", key=f"corrigir_tit_{eq}"):
+                    partida.corrigir_titulares(eq)
+                    st.info("Edição de titulares liberada.")
 
 
 # =====================================================
 # ABA 3 — CONTROLE DO JOGO (entradas, saídas e penalidades)
 # =====================================================
-import time, json
-import streamlit.components.v1 as components
-from string import Template  # ok repetir o import; não dá erro
-
-# ---------- Estado mínimo do relógio e dados ----------
-def _init_clock_state():
-    if "iniciado" not in st.session_state: st.session_state["iniciado"] = False
-    if "ultimo_tick" not in st.session_state: st.session_state["ultimo_tick"] = time.time()
-    if "cronometro" not in st.session_state: st.session_state["cronometro"] = 0.0
-    if "periodo" not in st.session_state: st.session_state["periodo"] = "1º Tempo"
-    if "invert_lados" not in st.session_state: st.session_state["invert_lados"] = False
-    if "penalties" not in st.session_state:
-        # penalties[eq] = [{numero, start, end, consumido}]
-        st.session_state["penalties"] = {"A": [], "B": []}
-    if "stats" not in st.session_state:
-        st.session_state["stats"] = {"A": {}, "B": {}}
-
 # ---------- Penalidades: helpers ----------
-def _equipe_penalidades(eq: str):
-    return st.session_state["penalties"].get(eq, [])
-
-def _registrar_exclusao(eq: str, numero: int, start_elapsed: float):
-    st.session_state["penalties"][eq].append({
-        "numero": int(numero),
-        "start": float(start_elapsed),
-        "end": float(start_elapsed) + 120.0,  # 2 minutos = 120s
-        "consumido": False
-    })
-
 def _penalidades_ativas(eq: str, agora_elapsed: float):
-    return [p for p in _equipe_penalidades(eq) if (agora_elapsed < p["end"]) and not p["consumido"]]
-
-def _penalidades_concluidas_nao_consumidas(eq: str, agora_elapsed: float):
-    return [p for p in _equipe_penalidades(eq) if (agora_elapsed >= p["end"]) and not p["consumido"]]
-
-# ---------- Cronômetro principal (JS fixo) ----------
-def render_cronometro_js():
-    iniciado = "true" if st.session_state["iniciado"] else "false"
-    base_elapsed = float(st.session_state["cronometro"])
-    start_epoch = float(st.session_state["ultimo_tick"]) if st.session_state["iniciado"] else None
-
-    st.markdown("""
-        <style>
-        .cronofixo { position: sticky; top: 0; z-index: 999; text-align:center; padding:6px 0; background:#fff;
-                     border-bottom:1px solid #e5e7eb; margin-bottom:10px; }
-        .digital { font-family:'Courier New', monospace; font-size:28px; font-weight:700;
-                   color:#FFD700; background:#000; padding:6px 16px; border-radius:8px;
-                   letter-spacing:2px; box-shadow:0 0 8px rgba(255,215,0,.4); display:inline-block; }
-        .team-head { color:#fff; padding:6px 10px; border-radius:8px; font-size:14px; font-weight:700; margin-bottom:6px; }
-        .sec-title { font-size:14px; font-weight:700; margin:6px 0 4px; }
-        .compact .stSelectbox label, .compact .stButton button, .compact .stRadio label { font-size:13px!important; }
-        .chip { display:inline-block; padding:2px 6px; border-radius:6px; font-size:12px; margin-left:6px; }
-        .chip-sai { background:#ffe5e5; color:#a30000; }
-        .chip-ent { background:#e7ffe7; color:#005a00; }
-        /* linha de quadra */
-        .chips-line { margin:6px 0 10px; display:flex; flex-wrap:wrap; gap:6px; }
-        .chip-quadra { background:#e8ffe8; color:#0b5; border:1px solid #bfe6bf; }
-        .chip-inelegivel { background:#f2f3f5; color:#888; border:1px solid #dcdfe3; opacity:.8; }
-        </style>
-    """, unsafe_allow_html=True)
-
-    html = f"""
-    <div class="cronofixo">
-      <div id="cronovisual" class="digital">⏱ 00:00</div>
-    </div>
-    <script>
-      (function(){{
-        const el = document.getElementById('cronovisual');
-        const iniciado = {iniciado};
-        const baseElapsed = {json.dumps(base_elapsed)};
-        const startEpoch = {json.dumps(start_epoch)};
-        function fmt(sec){{
-          sec = Math.max(0, Math.floor(sec));
-          const m = Math.floor(sec/60), s = sec % 60;
-          return (m<10?'0':'')+m+':' + (s<10?'0':'')+s;
-        }}
-        function tick(){{
-          let elapsed = baseElapsed;
-          if (iniciado && startEpoch){{
-            const now = Date.now()/1000;
-            elapsed = baseElapsed + (now - startEpoch);
-          }}
-          el.textContent = '⏱ ' + fmt(elapsed);
-        }}
-        tick();
-        if (window.__cronovisual_timer) clearInterval(window.__cronovisual_timer);
-        window.__cronovisual_timer = setInterval(tick, 250);
-      }})();
-    </script>
-    """
-    components.html(html, height=62)
+    return partida.penalidades_ativas(eq, agora_elapsed)
+
+# ---------- Cronômetro principal + 2' (componente único) ----------
+def _equipes_cronometro(lados, agora: float):
+    """Dados do componente: nome e penalidades ativas de cada equipe, na ordem de exibição."""
+    return [
+        {
+            "nome": get_team_name(eq),
+            "penalidades": [
+                {"id": p["id"], "numero": p["numero"], "end": p["end"]}
+                for p in _penalidades_ativas(eq, agora)
+            ],
+        }
+        for eq in lados
+    ]
+
+def render_cronometro_js(lados=("A", "B")):
+    """Relógio e todas as contagens de 2' num só iframe, a partir da mesma base de tempo."""
+    base_elapsed = float(partida.cronometro)
+    start_epoch = float(partida.ultimo_tick) if partida.iniciado else None
+    equipes = _equipes_cronometro(lados, tempo_logico_atual())
+    # o componente avisa quando uma contagem zera no cliente → rerun avança a agenda
+    cronometro_partida(
+        partida.iniciado, base_elapsed, start_epoch, equipes,
+        recebido=INICIO_RERUN, fim_periodo=partida.fim_periodo(),
+    )
+    perfil.contar("iframes")
 
 # ---------- Botões do relógio ----------
 def iniciar():
-    if not st.session_state["iniciado"]:
-        st.session_state["iniciado"] = True
-        st.session_state["ultimo_tick"] = time.time()
+    if partida.iniciar():
         st.toast("⏱️ Iniciado", icon="▶️")
 
 def pausar():
-    if st.session_state["iniciado"]:
-        agora = time.time()
-        st.session_state["cronometro"] += agora - st.session_state["ultimo_tick"]
-        st.session_state["iniciado"] = False
+    if partida.pausar():
         st.toast("⏸️ Pausado", icon="⏸️")
 
 def zerar():
-    st.session_state["iniciado"] = False
-    st.session_state["cronometro"] = 0.0
-    st.session_state["ultimo_tick"] = time.time()
+    partida.zerar()
     st.toast("🔁 Zerado", icon="🔁")
 
-# ---------- Utilitários de tempo / stats ----------
-def _ensure_player_stats(eq: str, numero: int):
-    if "stats" not in st.session_state:
-        st.session_state["stats"] = {"A": {}, "B": {}}
-    return st.session_state["stats"][eq].setdefault(int(numero), {
-        "jogado_1t": 0.0, "jogado_2t": 0.0, "banco": 0.0, "doismin": 0.0
-    })
-
-def tempo_logico_atual() -> float:
-    if st.session_state["iniciado"]:
-        return st.session_state["cronometro"] + (time.time() - st.session_state["ultimo_tick"])
-    return st.session_state["cronometro"]
-
+# ---------- Utilitários de tempo ----------
 def _parse_mmss(txt: str) -> int | None:
     try:
         mm, ss = txt.strip().split(":")
@@ -306,27 +391,18 @@ def _parse_mmss(txt: str) -> int | None:
     except Exception:
         return None
 
-# (usa helpers já existentes do app: get_team_name, atualizar_estado, elenco, jogadores_por_estado)
+# (usa helpers já existentes do app: get_team_name, elenco, jogadores_por_estado)
 
 # ---------- Painel da equipe ----------
 def painel_equipe(eq: str):
-    cor = st.session_state["cores"].get(eq, "#333")
+    cor = partida.cores.get(eq, "#333")
     nome = get_team_name(eq)
-    st.markdown(f"<div class='team-head' style='background:{cor};'>{nome}</div>", unsafe_allow_html=True)
+    st.markdown(CABECALHO_EQUIPE(cor=cor, nome=nome), unsafe_allow_html=True)
 
     # Linha com quem está em quadra (jogando) e quem está nos 2' (cinza)
-    jogadores = st.session_state["equipes"].get(eq, [])
-    on_court = sorted([int(j["numero"]) for j in jogadores if j.get("estado") == "jogando" and j.get("elegivel", True)])
-    excluidos = sorted([int(j["numero"]) for j in jogadores if j.get("estado") == "excluido" and j.get("elegivel", True)])
-
-    chips = []
-    for num in on_court:
-        chips.append(f"<span class='chip chip-quadra' title='Jogando'>#{num}</span>")
-    for num in excluidos:
-        chips.append(f"<span class='chip chip-inelegivel' title='Cumprindo 2 minutos'>#{num}</span>")
-
+    chips = chips_quadra(eq)
     if chips:
-        st.markdown(f"<div class='chips-line'>{''.join(chips)}</div>", unsafe_allow_html=True)
+        st.markdown(chips, unsafe_allow_html=True)
     else:
         st.caption("Nenhum jogador em quadra no momento.")
 
@@ -341,16 +417,12 @@ def painel_equipe(eq: str):
         sai = cols_sub[0].selectbox("Sai", list_sai, key=f"sai_{eq}")
         entra = cols_sub[1].selectbox("Entra", list_entra, key=f"entra_{eq}")
         if cols_sub[2].button("Confirmar", key=f"btn_sub_{eq}", disabled=(not list_sai or not list_entra)):
-            if (sai in list_sai) and (entra in list_entra):
-                atualizar_estado(eq, sai, "banco")
-                atualizar_estado(eq, entra, "jogando")
-                st.success(f"Substituição: Sai {sai} / Entra {entra}", icon="🔁")
-                st.markdown(
-                    f"<span class='chip chip-sai'>Sai {sai}</span><span class='chip chip-ent'>Entra {entra}</span>",
-                    unsafe_allow_html=True
-                )
+            ok, msg = partida.substituicao(eq, sai, entra)
+            if ok:
+                st.success(msg, icon="🔁")
+                st.markdown(CHIPS_TROCA(sai=sai, entra=entra), unsafe_allow_html=True)
             else:
-                st.error("Seleção inválida para substituição.")
+                st.error(msg)
         st.markdown("---")
 
         # --- 2 minutos & Completou ---
@@ -361,25 +433,16 @@ def painel_equipe(eq: str):
             jogadores_all = elenco(eq)
             jog_2m = st.selectbox("Jogador", jogadores_all, key=f"doismin_sel_{eq}")
             if st.button("Aplicar 2'", key=f"btn_2min_{eq}", disabled=(len(jogadores_all) == 0)):
-                atualizar_estado(eq, jog_2m, "excluido")
-                start = tempo_logico_atual()
-                _registrar_exclusao(eq, jog_2m, start_elapsed=start)
-                st.warning(f"Jogador {jog_2m} excluído por 2 minutos.")
+                ok, msg = partida.exclusao_2min(eq, jog_2m)
+                (st.warning if ok else st.error)(msg)
 
         with cols_pen[1]:
             st.markdown("<div class='sec-title'>✅ Completou</div>", unsafe_allow_html=True)
-            agora = tempo_logico_atual()
-            concluidas = _penalidades_concluidas_nao_consumidas(eq, agora)
             elegiveis_retorno = jogadores_por_estado(eq, "banco") + jogadores_por_estado(eq, "excluido")
             comp = st.selectbox("Jogador que entra", elegiveis_retorno, key=f"comp_sel_{eq}")
             if st.button("Confirmar retorno", key=f"btn_comp_{eq}", disabled=(len(elegiveis_retorno) == 0)):
-                if not concluidas:
-                    st.error("Ainda não há exclusões concluídas (2' completos). Aguarde.")
-                else:
-                    concluidas.sort(key=lambda p: p["end"])
-                    concluidas[0]["consumido"] = True
-                    atualizar_estado(eq, comp, "jogando")
-                    st.success(f"Jogador {comp} entrou após 2'.")
+                ok, msg = partida.completou(eq, comp)
+                (st.success if ok else st.error)(msg)
 
         st.markdown("---")
 
@@ -388,23 +451,13 @@ def painel_equipe(eq: str):
         jogadores_all = elenco(eq)
         exp = st.selectbox("Jogador", jogadores_all, key=f"exp_sel_{eq}")
         if st.button("Confirmar expulsão", key=f"btn_exp_{eq}", disabled=(len(jogadores_all) == 0)):
-            ok = False
-            for j in st.session_state["equipes"][eq]:
-                if int(j["numero"]) == int(exp):
-                    j["estado"] = "expulso"
-                    j["elegivel"] = False
-                    ok = True
-                    break
-            if ok:
-                st.error(f"Jogador {exp} expulso.")
-            else:
-                st.error("Não foi possível expulsar o jogador selecionado.")
+            ok, msg = partida.expulsao(eq, exp)
+            st.error(msg)
 
         st.markdown("</div>", unsafe_allow_html=True)
 
 # ---------- Render da ABA 3 ----------
-with abas[2]:
-    _init_clock_state()
+if aba == ABAS[2]:
     st.subheader("Controle do Jogo")
 
     # Linha do relógio e período
@@ -416,97 +469,67 @@ with abas[2]:
     with cc3:
         if st.button("🔁 Zerar", key="clk_reset"): zerar()
     with cc4:
-        st.session_state["periodo"] = st.selectbox(
+        # só a escolha do operador muda o período (não o valor que o widget guardou)
+        st.selectbox(
             "Período", ["1º Tempo", "2º Tempo"],
-            index=0 if st.session_state["periodo"] == "1º Tempo" else 1,
-            key="sel_periodo"
+            index=0 if partida.periodo == "1º Tempo" else 1,
+            key="sel_periodo",
+            on_change=lambda: partida.mudar_periodo(st.session_state["sel_periodo"]),
         )
     with cc5:
         st.session_state["invert_lados"] = st.toggle("Inverter lados (A ⇄ B)", value=st.session_state["invert_lados"])
 
-    # Cronômetro JS
-    render_cronometro_js()
+    # Desfazer/refazer: um nível por clique do operador (qualquer ação desta aba)
+    def _desfazer_refazer(ok_msg):
+        ok, msg = ok_msg
+        st.session_state["flash_desfazer"] = (ok, msg)
+        if ok:
+            _sincronizar_widgets(partida)  # seleções e período refletem o estado desfeito/refeito
+        st.rerun()
+
+    cu1, cu2, cu3 = st.columns([1, 1, 3])
+    desfazer, refazer = partida.proximo_desfazer(), partida.proximo_refazer()
+    with cu1:
+        if st.button(f"↩️ Desfazer{f' ({desfazer})' if desfazer else ''}", key="btn_desfazer", disabled=desfazer is None):
+            _desfazer_refazer(partida.desfazer())
+    with cu2:
+        if st.button(f"↪️ Refazer{f' ({refazer})' if refazer else ''}", key="btn_refazer", disabled=refazer is None):
+            _desfazer_refazer(partida.refazer())
+    with cu3:
+        if "flash_desfazer" in st.session_state:
+            ok, msg = st.session_state.pop("flash_desfazer")
+            (st.info if ok else st.warning)(msg, icon="↩️")
 
     # Painéis lado a lado — respeitando “Inverter lados”
     lados = ("A", "B") if not st.session_state["invert_lados"] else ("B", "A")
+
+    # Cronômetro + penalidades ativas (um único componente)
+    with secao("render_cronometro_js"):
+        render_cronometro_js(lados)
+
     col_esq, col_dir = st.columns(2)
     with col_esq:
-        if st.session_state["equipes"][lados[0]]:
+        if partida.equipes.jogadores(lados[0]):
             st.markdown(f"#### {get_team_name(lados[0])}")
-            painel_equipe(lados[0])
+            with secao(f"painel_equipe {lados[0]}"):
+                painel_equipe(lados[0])
         else:
             st.info(f"Cadastre a {get_team_name(lados[0])} na aba de Configuração.")
     with col_dir:
-        if st.session_state["equipes"][lados[1]]:
+        if partida.equipes.jogadores(lados[1]):
             st.markdown(f"#### {get_team_name(lados[1])}")
-            painel_equipe(lados[1])
+            with secao(f"painel_equipe {lados[1]}"):
+                painel_equipe(lados[1])
         else:
             st.info(f"Cadastre a {get_team_name(lados[1])} na aba de Configuração.")
 
-    # -------------------- Penalidades ativas (persistentes) --------------------
-    st.markdown("### Penalidades ativas")
-    agora = tempo_logico_atual()
-
-    def _render_pen_timers(eq: str):
-        ativas = _penalidades_ativas(eq, agora)
-        if not ativas:
-            st.caption(f"{get_team_name(eq)}: nenhuma penalidade ativa.")
-            return
-        st.markdown(f"**{get_team_name(eq)}**")
-        for p in ativas:
-            restante = max(0, int(round(p["end"] - agora)))
-            minutos = restante // 60
-            segundos = restante % 60
-            elem_id = f"pen_{eq}_{p['numero']}_{int(p['start'])}"  # id único
-
-            html_tpl = Template("""
-            <div style="margin:6px 0;">
-              <div style="display:flex;align-items:center;gap:8px;">
-                <div style="font-size:13px;">#$numero — resta:</div>
-                <div id="$elem_id" style="font-family:'Courier New';font-size:18px;color:#FF3333;background:#111;padding:3px 10px;border-radius:6px;display:inline-block;text-shadow:0 0 6px red;">$mm:$ss</div>
-              </div>
-            </div>
-            <script>
-              (function(){
-                let r = $restante;
-                const el = document.getElementById("$elem_id");
-                const beep = new Audio("https://actions.google.com/sounds/v1/alarms/beep_short.ogg");
-                function tick(){
-                  r = Math.max(0, r-1);
-                  const m = String(Math.floor(r/60)).padStart(2,'0');
-                  const s = String(r%60).padStart(2,'0');
-                  if (el) el.textContent = m + ":" + s;
-                  if (r <= 0) { try { beep.play(); } catch(e) {} clearInterval(window["timer_$elem_id"]); }
-                }
-                if (window["timer_$elem_id"]) clearInterval(window["timer_$elem_id"]);
-                window["timer_$elem_id"] = setInterval(tick, 1000);
-              })();
-            </script>
-            """)
-            html = html_tpl.substitute(
-                numero=int(p["numero"]),
-                elem_id=elem_id,
-                mm=f"{minutos:02d}",
-                ss=f"{segundos:02d}",
-                restante=int(restante),
-            )
-            components.html(html, height=48)
-
-    colA_t, colB_t = st.columns(2)
-    with colA_t: _render_pen_timers(lados[0])
-    with colB_t: _render_pen_timers(lados[1])
-
     # -----------------------------------------------------
-    # Substituições avulsas (retroativas) — sempre aplica ao estado atual
+    # Lançamentos retroativos — entram na linha do tempo no instante informado
     # -----------------------------------------------------
     st.divider()
-    st.markdown("## 📝 Substituições avulsas (retroativas)")
-
-    # Garantia de stats
-    if "stats" not in st.session_state:
-        st.session_state["stats"] = {"A": {}, "B": {}}
+    st.markdown("## 📝 Lançamentos retroativos")
 
-    col_eq, col_time = st.columns([1, 1])
+    col_eq, col_time, col_tipo = st.columns([1, 1, 1])
     with col_eq:
         equipe_sel = st.radio(
             "Equipe", ["A", "B"],
@@ -519,14 +542,17 @@ with abas[2]:
             ["1º Tempo", "2º Tempo"],
             key="retro_periodo",
         )
+    with col_tipo:
+        tipo_sel = st.radio("Lançamento", ["Substituição", "Exclusão 2'"], horizontal=True, key="retro_tipo")
 
     all_nums = elenco(equipe_sel)
     c1, c2, c3 = st.columns([1, 1, 1])
     with c1:
-        sai_num = st.selectbox("Sai", all_nums, key="retro_sai")
+        sai_num = st.selectbox("Sai" if tipo_sel == "Substituição" else "Jogador", all_nums, key="retro_sai")
     with c2:
-        entra_opcoes = [n for n in all_nums if n != sai_num]
-        entra_num = st.selectbox("Entra", entra_opcoes, key="retro_entra")
+        if tipo_sel == "Substituição":
+            entra_opcoes = [n for n in all_nums if n != sai_num]
+            entra_num = st.selectbox("Entra", entra_opcoes, key="retro_entra")
     with c3:
         tempo_str = st.text_input(
             "Tempo do jogo (MM:SS)",
@@ -540,42 +566,21 @@ with abas[2]:
         if t_mark is None:
             st.error("Tempo inválido. Use o formato MM:SS (ex.: 07:45).")
             return
-        if sai_num == entra_num:
-            st.error("Os jogadores de 'Sai' e 'Entra' precisam ser diferentes.")
-            return
-
-        now_elapsed = tempo_logico_atual()
-        dt = max(0.0, float(now_elapsed) - float(t_mark))
-        if dt <= 0:
-            st.warning("O tempo informado é igual ou maior que o tempo atual — nada a corrigir.")
+        if tipo_sel == "Substituição":
+            ok, msg, dt = partida.retro(equipe_sel, sai_num, entra_num, t_mark, periodo_sel)
+            texto = f"Substituição retroativa realizada: Sai {sai_num} / Entra {entra_num}"
+            chips = CHIPS_TROCA(sai=sai_num, entra=entra_num)
+        else:
+            ok, msg = partida.exclusao_2min(equipe_sel, sai_num, desde=t_mark, periodo=periodo_sel)
+            texto, chips = f"Exclusão retroativa: #{sai_num} a partir de {tempo_str} ({periodo_sel})", ""
+        if not ok:
+            st.warning(msg)
             return
 
-        jog_key = "jogado_1t" if periodo_sel == "1º Tempo" else "jogado_2t"
-        s_out = _ensure_player_stats(equipe_sel, int(sai_num))
-        s_in  = _ensure_player_stats(equipe_sel, int(entra_num))
-
-        s_out[jog_key]  = max(0.0, s_out[jog_key] - dt)
-        s_out["banco"] += dt
-        s_in["banco"]   = max(0.0, s_in["banco"] - dt)
-        s_in[jog_key]  += dt
-
-        atualizar_estado(equipe_sel, int(sai_num), "banco")
-        atualizar_estado(equipe_sel, int(entra_num), "jogando")
-
-        # Mensagem detalhada (log local desta execução)
-        mm_dt, ss_dt = int(dt // 60), int(dt % 60)
-        st.info(
-            f"Retroativo aplicado ({periodo_sel}) em {get_team_name(equipe_sel)}: "
-            f"Sai {sai_num} (−{mm_dt:02d}:{ss_dt:02d} jogado, + banco) | "
-            f"Entra {entra_num} (+ jogado, − banco) a partir de {tempo_str} até agora."
-        )
-
         # 💬 preparar mensagem "flash" (após rerun) com chips
-        st.session_state["flash_text"] = f"Substituição retroativa realizada: Sai {sai_num} / Entra {entra_num}"
-        st.session_state["flash_html"] = (
-            f"<span class='chip chip-sai'>Sai {sai_num}</span>"
-            f"<span class='chip chip-ent'>Entra {entra_num}</span>"
-        )
+        st.session_state["flash_text"] = texto
+        if chips:
+            st.session_state["flash_html"] = chips
 
         # limpar seleções e forçar re-render
         for k in (
@@ -586,7 +591,9 @@ with abas[2]:
 
         st.rerun()
 
-    if st.button("➕ Inserir substituição retroativa", use_container_width=True, key="retro_btn"):
+    sem_jogadores = not all_nums or (tipo_sel == "Substituição" and not entra_opcoes)
+    if st.button("➕ Inserir lançamento retroativo", use_container_width=True, key="retro_btn",
+                 disabled=sem_jogadores, help="Cadastre o elenco da equipe primeiro." if sem_jogadores else None):
         aplicar_retro()
 
     # Mensagem “flash” da retroativa (aparece AQUI, abaixo do botão)
@@ -599,74 +606,82 @@ with abas[2]:
         st.session_state.pop("flash_html", None)
 
 
+# ---------- Relatório (usado pela aba 4 e pelos espectadores) ----------
+def _stats_to_dataframe():
+    """Relatório da aba 4 num único retrato do relógio: conversão, arredondamento e totais vetorizados."""
+    agora_elapsed = tempo_logico_atual()
+    linha = partida.linha
+    chave = (partida.revisao, partida.penalidades.versao, round(agora_elapsed, 1))  # revisao: muda também ao desfazer
+    cache = st.session_state.get("_df_stats")
+    if cache is not None and cache[0] == chave:
+        return cache[1]  # relógio parado e nada novo: mesmo retrato
+
+    df = tabela_tempos(
+        linha.retrato(agora_elapsed),
+        partida.cumprido(agora_elapsed),  # 2' agrupado por jogador, uma vez
+        partida.cores,
+    )
+    st.session_state["_df_stats"] = (chave, df)
+    return df
+
+def _curvas_quadra():
+    """Quebras das curvas de tempo em quadra; só mudam com eventos, não com o relógio."""
+    cache = st.session_state.get("_curvas_quadra")
+    if cache is None or cache[0] != partida.revisao:
+        cache = st.session_state["_curvas_quadra"] = (partida.revisao, partida.linha.curvas_quadra())
+    return cache[1]
+
+def _restante_2min(agora):
+    """(equipe, número) -> segundos que faltam do 2' em curso (2' sobrepostos: até o último)."""
+    restante = {}
+    for eq in ("A", "B"):
+        for p in partida.penalidades_ativas(eq, agora):
+            chave = (eq, p["numero"])
+            restante[chave] = max(restante.get(chave, 0.0), p["end"] - agora)
+    return restante
+
+def publicar_espectadores():
+    """Publica o retrato desta partida para a vista do espectador quando algo além do relógio mudou.
+
+    Só registros (revisao), penalidades, nomes e cores mudam o retrato; os minutos
+    entre um evento e outro o espectador tira do relógio publicado.
+    """
+    chave = (
+        partida.revisao, partida.penalidades.versao,
+        get_team_name("A"), get_team_name("B"), tuple(partida.cores.values()),
+    )
+    if st.session_state.get("_publicado") == chave:
+        return
+    st.session_state["_publicado"] = chave
+    agora = tempo_logico_atual()
+    df = tabela_tempos(partida.linha.retrato(agora), partida.cumprido(agora), partida.cores)
+    _quadro().publicar(str(st.session_state.get("partida_id", "local")), chave, {
+        "tempo": agora,
+        "periodo": partida.periodo,
+        "restante_2min": _restante_2min(agora),
+        "relogio": {
+            "iniciado": partida.iniciado,
+            "base_elapsed": float(partida.cronometro),
+            "start_epoch": float(partida.ultimo_tick) if partida.iniciado else None,
+            "fim_periodo": partida.fim_periodo(),
+        },
+        "equipes": _equipes_cronometro(("A", "B"), agora),
+        "nomes": {eq: get_team_name(eq) for eq in ("A", "B")},
+        "cores": dict(partida.cores),
+        "chips": {eq: chips_quadra(eq) for eq in ("A", "B")},
+        "stats": df.drop(columns=["CorEquipe"]) if not df.empty else df,
+    })
+
+
 # =====================================================
 # ABA 4 — VISUALIZAÇÃO DE DADOS (auto opcional)
 # =====================================================
-with abas[3]:
-    import pandas as pd
-
-    if "last_accum" not in st.session_state:
-        st.session_state["last_accum"] = time.time()
+if aba == ABAS[3]:
     if "viz_auto" not in st.session_state:
         st.session_state["viz_auto"] = False
     if "viz_interval" not in st.session_state:
         st.session_state["viz_interval"] = 1.0
 
-    def _accumulate_time_tick():
-        now = time.time()
-        dt = max(0.0, now - st.session_state["last_accum"])
-        st.session_state["last_accum"] = now
-        jogado_key = "jogado_1t" if st.session_state["periodo"] == "1º Tempo" else "jogado_2t"
-        for eq in ["A", "B"]:
-            for j in st.session_state["equipes"].get(eq, []):
-                num = int(j["numero"])
-                s = _ensure_player_stats(eq, num)
-                estado = j.get("estado", "banco")
-                if estado == "jogando":
-                    s[jogado_key] += dt
-                elif estado == "banco":
-                    s["banco"] += dt
-                elif estado == "excluido":
-                    s["doismin"] += dt
-
-    def _doismin_por_jogador_agora(eq: str, numero: int, agora_elapsed: float) -> float:
-        total_sec = 0.0
-        for p in st.session_state.get("penalties", {}).get(eq, []):
-            if int(p["numero"]) != int(numero): continue
-            a, b = float(p["start"]), float(p["end"])
-            cumprido = max(0.0, min(agora_elapsed, b) - a)
-            total_sec += cumprido
-        return total_sec / 60.0
-
-    def _stats_to_dataframe():
-        rows = []
-        for eq in ["A", "B"]:
-            cor = st.session_state["cores"].get(eq, "#333")
-            for j in st.session_state["equipes"].get(eq, []):
-                num = int(j["numero"])
-                est = j.get("estado", "banco")
-                exc = j.get("exclusoes", 0)
-                s = st.session_state["stats"][eq].get(num, {"jogado_1t":0, "jogado_2t":0, "banco":0, "doismin":0})
-                j1 = s["jogado_1t"] / 60.0
-                j2 = s["jogado_2t"] / 60.0
-                jog_total = j1 + j2
-                banco_min = s["banco"] / 60.0
-                agora_elapsed = tempo_logico_atual()
-                dois_min = round(_doismin_por_jogador_agora(eq, num, agora_elapsed), 1)
-                rows.append({
-                    "Equipe": eq,
-                    "Número": num,
-                    "Estado": est,
-                    "Exclusões": exc,
-                    "Jogado 1ºT (min)": round(j1, 1),
-                    "Jogado 2ºT (min)": round(j2, 1),
-                    "Jogado Total (min)": round(jog_total, 1),
-                    "Banco (min)": round(banco_min, 1),
-                    "2 min (min)": round(dois_min, 1),
-                    "CorEquipe": cor,
-                })
-        return pd.DataFrame(rows).sort_values(["Equipe", "Número"]) if rows else pd.DataFrame()
-
     st.subheader("Visualização de Dados")
 
     cauto1, cauto2 = st.columns([1, 1])
@@ -674,7 +689,7 @@ with abas[3]:
         st.session_state["viz_auto"] = st.toggle(
             "Atualizar automaticamente (1s)",
             value=st.session_state["viz_auto"],
-            help="Recalcula os tempos a cada segundo apenas nesta aba."
+            help="Recalcula só as tabelas desta aba, sem re-executar o restante da página."
         )
     with cauto2:
         st.session_state["viz_interval"] = st.number_input(
@@ -683,29 +698,146 @@ with abas[3]:
             help="Intervalo da atualização automática desta aba."
         )
 
-    _accumulate_time_tick()
+    # Só a região de estatísticas é re-executada no intervalo escolhido
+    # (fragmento); as abas de controle não rodam de novo nem ficam bloqueadas.
+    intervalo = float(st.session_state["viz_interval"]) if st.session_state["viz_auto"] else None
 
-    df = _stats_to_dataframe()
-    if df.empty:
-        st.info("Sem dados ainda. Cadastre equipes, defina titulares e inicie o controle do jogo.")
-    else:
-        for eq in ["A", "B"]:
-            sub = df[df["Equipe"] == eq].copy()
-            if sub.empty: continue
-            cor = sub["CorEquipe"].iloc[0]
-            st.markdown(
-                f"<div style='background:{cor};color:#fff;padding:6px 10px;border-radius:8px;font-weight:700;margin-top:8px;'>{get_team_name(eq)}</div>",
-                unsafe_allow_html=True
-            )
-            st.dataframe(sub.drop(columns=["CorEquipe"]), use_container_width=True)
+    @st.fragment(run_every=intervalo)
+    def _painel_estatisticas():
+        with perfil.fragmento("estatisticas"):
+            _conteudo_estatisticas()
 
-        st.markdown("---")
-        st.markdown("#### Relatório combinado")
-        st.dataframe(df.drop(columns=["CorEquipe"]), use_container_width=True)
+    def _conteudo_estatisticas():
+        with secao("_stats_to_dataframe"):
+            df = _stats_to_dataframe()
+        if df.empty:
+            st.info("Sem dados ainda. Cadastre equipes, defina titulares e inicie o controle do jogo.")
+        else:
+            with secao("graficos_minutos"):
+                linha = partida.linha
+                graficos_minutos(
+                    df, _curvas_quadra(), linha.absoluto(tempo_logico_atual()),
+                    geracao=(partida.reconstrucoes, linha.reescritas),
+                    periodos=[ev["abs"] for ev in linha.eventos if ev["tipo"] == "periodo"],
+                    nomes={eq: get_team_name(eq) for eq in ("A", "B")},
+                )
+                perfil.contar("iframes")
+            for eq in ["A", "B"]:
+                sub = df[df["Equipe"] == eq].copy()
+                if sub.empty: continue
+                cor = sub["CorEquipe"].iloc[0]
+                st.markdown(
+                    f"<div style='background:{cor};color:#fff;padding:6px 10px;border-radius:8px;font-weight:700;margin-top:8px;'>{get_team_name(eq)}</div>",
+                    unsafe_allow_html=True
+                )
+                st.dataframe(sub.drop(columns=["CorEquipe"]), use_container_width=True)
+
+            st.markdown("---")
+            st.markdown("#### Relatório combinado")
+            st.dataframe(df.drop(columns=["CorEquipe"]), use_container_width=True)
+
+            # os arquivos só são montados quando pedidos, não a cada rerun/auto-atualização
+            c_csv, c_pq = st.columns(2)
+            with c_csv:
+                if st.button("📄 Gerar CSV", key="gerar_csv", help="Monta o arquivo com os tempos deste momento."):
+                    st.session_state["_csv_relatorio"] = (
+                        formato_mmss(tempo_logico_atual()),
+                        df.drop(columns=["CorEquipe"]).to_csv(index=False).encode("utf-8"),
+                    )
+                if "_csv_relatorio" in st.session_state:
+                    gerado, csv = st.session_state["_csv_relatorio"]
+                    st.download_button(f"📥 Baixar CSV ({gerado})", data=csv, file_name="relatorio_tempos.csv", mime="text/csv")
+            with c_pq:
+                if exportacao.disponivel() and st.button(
+                    "🏁 Exportar partida (Parquet)", key="exportar_parquet",
+                    help=f"Acrescenta esta partida ao dataset da temporada em {exportacao.DIRETORIO}.",
+                ):
+                    arquivos = exportacao.exportar_partida(partida, _id_partida())
+                    st.success(f"{len(arquivos)} arquivo(s) gravado(s) em {exportacao.DIRETORIO}.")
+
+    _painel_estatisticas()
+
+    # Consulta na linha de escalações (util/escalacoes.py): busca binária, sem refazer o jogo
+    with st.expander("🔎 Quem estava em quadra?"):
+        c_per, c_t = st.columns(2)
+        with c_per:
+            per_consulta = st.selectbox("Período", ["1º Tempo", "2º Tempo"], key="quadra_periodo")
+        with c_t:
+            t_consulta = _parse_mmss(st.text_input("Tempo do jogo (MM:SS)", value="00:00", key="quadra_tempo"))
+        if t_consulta is None:
+            st.error("Tempo inválido. Use o formato MM:SS (ex.: 23:40).")
+        else:
+            for eq in ("A", "B"):
+                numeros = partida.em_quadra(eq, t_consulta, per_consulta)
+                if numeros is None:
+                    st.caption("Esse instante ainda não aconteceu nesse período.")
+                    break
+                chips = "".join(CHIP_QUADRA(n) for n in numeros) or "—"
+                st.markdown(f"**{get_team_name(eq)}**: {chips}", unsafe_allow_html=True)
+
+    # Entrosamento (util/entrosamento.py): minutos por escalação e por dupla até agora
+    with st.expander("🤝 Escalações e duplas"):
+        fim = partida.linha.absoluto(tempo_logico_atual())
+        for eq in ("A", "B"):
+            esc = partida.linha.escalacoes.get(eq)
+            if esc is None:
+                continue
+            st.markdown(CABECALHO_EQUIPE(cor=partida.cores.get(eq, "#333"), nome=get_team_name(eq)), unsafe_allow_html=True)
+            c_esc, c_par = st.columns(2)
+            with c_esc:
+                st.caption("Escalações que mais jogaram juntas (min)")
+                st.dataframe(
+                    [{"Escalação": " ".join(map(str, nums)), "Minutos": round(s / 60, 1)}
+                     for nums, s in entrosamento.tempo_por_escalacao(esc, fim)[:10]],
+                    hide_index=True, use_container_width=True,
+                )
+            with c_par:
+                st.caption("Minutos juntos por dupla (diagonal: em quadra)")
+                numeros, m = entrosamento.matriz_pares(esc, fim)
+                jogou = m.diagonal() > 0  # quem não entrou em quadra só ocupa espaço
+                nums = [n for n, j in zip(numeros, jogou) if j]
+                st.dataframe(pd.DataFrame((m[jogou][:, jogou] / 60).round(1), index=nums, columns=nums), use_container_width=True)
 
-        csv = df.drop(columns=["CorEquipe"]).to_csv(index=False).encode("utf-8")
-        st.download_button("📥 Baixar CSV (todas as equipes)", data=csv, file_name="relatorio_tempos.csv", mime="text/csv")
 
-    if st.session_state["viz_auto"]:
-        time.sleep(float(st.session_state["viz_interval"]))
-        st.rerun()
+# Espectadores e avisos não dependem da aba aberta
+publicar_espectadores()
+if st.session_state["alarmes"]:
+    # penalidades que venceram desde o último rerun; o bipe toca no componente
+    for p in st.session_state["alarmes"]:
+        st.toast(f"2' concluído: {get_team_name(p['equipe'])} #{p['numero']}", icon="⏰")
+    st.session_state["alarmes"] = []
+
+
+# =====================================================
+# 🩺 Perfil de rerun — fecha a medição e mostra o painel
+# =====================================================
+def _widgets_no_rerun():
+    """Widgets registrados neste rerun; None se esta versão do Streamlit não expõe a contagem."""
+    ctx = get_script_run_ctx()
+    ids = getattr(getattr(ctx, "shared", None), "widget_ids_this_run", None)  # versões atuais (ex.: 1.65): ctx.shared
+    if ids is None:
+        ids = getattr(ctx, "widget_ids_this_run", None)  # versões antigas: no próprio contexto
+    if ids is None:
+        return None
+    return len(ids.snapshot() if hasattr(ids, "snapshot") else ids)
+
+_n_widgets = _widgets_no_rerun()
+perfil.fim_rerun(**({} if _n_widgets is None else {"widgets": _n_widgets}))  # sem contagem: fica fora, não vira 0
+if perfil.ativo:
+    with st.sidebar.expander("🩺 Perfil (ms)", expanded=True):
+        tipos = perfil.tipos()
+        if tipos:
+            for tipo in tipos:  # rerun completo e cada fragmento sozinho, separados
+                resumo = perfil.percentis(tipo)
+                st.markdown(f"**{tipo}**")
+                st.dataframe(
+                    [{"seção": k, **{m: round(v, 1) for m, v in r.items()}} for k, r in sorted(resumo.items())],
+                    hide_index=True, use_container_width=True,
+                )
+            st.caption(
+                f"Últimos {len(perfil.reruns)} registros (buffer de {perfil.reruns.maxlen}). '#' = contagens; "
+                "#iframes conta os componentes emitidos (relógio e gráficos)."
+            )
+            st.download_button("Exportar JSON", data=perfil.exportar_json(), file_name="perfil_reruns.json", mime="application/json")
+        else:
+            st.caption("Sem reruns medidos ainda.")
@@ -0,0 +1,176 @@
+# Microbenchmarks dos caminhos quentes: as regras de util.motor.Partida e os
+# objetos por trás dos helpers de estado do app.py (atualizar_estado,
+# jogadores_por_estado, _penalidades_ativas, _stats_to_dataframe), com
+# partidas roteirizadas de 7 a 20 jogadores e 0 a 500 penalidades.
+#
+#   python -m bench.microbench                # mede e compara com bench/baseline.json
+#   python -m bench.microbench --salvar       # grava as medições como nova linha de base
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+from util.linha_tempo import SEGUNDO_TEMPO
+from util.motor import Partida
+from util.penalidades import AgendaPenalidades
+from util.relatorio import tabela_tempos
+
+ELENCOS = (7, 14, 20)
+HISTORICOS = (0, 100, 500)
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+CORES = {"A": "#00AEEF", "B": "#EC008C"}
+
+
+# =============== PARTIDAS ROTEIRIZADAS ===============
+def _agenda(historico):
+    """Agenda com 'historico' penalidades espalhadas pela partida, metade já consumida."""
+    agenda = AgendaPenalidades()
+    for i in range(historico):
+        eq = "AB"[i % 2]
+        agenda.adicionar(eq, 1 + i % 7, inicio=i * 7.0)
+        if i % 2:
+            agenda.consumir_proxima(eq, i * 7.0 + 120.0)
+    return agenda
+
+def partida_roteirizada(elenco, historico):
+    """Partida (relógio falso) após um 1º tempo e meio 2º tempo, pausada, com a agenda de '_agenda'."""
+    relogio = [0.0]
+    partida = Partida(relogio=lambda: relogio[0])
+    for eq in ("A", "B"):
+        partida.definir_equipe(eq, range(1, elenco + 1))
+        partida.definir_titulares(eq, range(1, 8))
+    partida.penalidades = _agenda(historico)
+    partida.iniciar()
+    for i in range(60):  # uma substituição a cada 45 s, alternando as equipes
+        relogio[0] += 45.0
+        if i == 40:
+            partida.mudar_periodo(SEGUNDO_TEMPO)
+        eq = "AB"[i % 2]
+        quadra, banco = partida.numeros_por_estado(eq, "jogando"), partida.numeros_por_estado(eq, "banco")
+        if quadra and banco:
+            partida.substituicao(eq, quadra[i % len(quadra)], banco[i % len(banco)])
+    partida.pausar()
+    return partida
+
+
+# =============== CASOS ===============
+def casos(elenco, historico):
+    """[(nome, função)] — cada função é um ciclo que devolve jogadores ao ponto de partida
+    (a linha do tempo e a agenda só crescem, como numa partida real)."""
+    regras = partida_roteirizada(elenco, historico)
+    regras.definir_titulares("A", range(1, 8))  # 1..7 em quadra, o resto no banco
+    partida = partida_roteirizada(elenco, historico)
+    agora = partida.tempo()
+    banco = elenco > 7
+
+    def titulares():
+        regras.definir_titulares("A", range(1, 8))
+
+    def substituicao():
+        regras.substituicao("A", 1, 8)
+        regras.substituicao("A", 8, 1)
+
+    def exclusao_completou():
+        regras.exclusao_2min("A", 2)
+        regras.cronometro += 120.0  # relógio pausado: os 2' vencem
+        regras.completou("A", 2)
+
+    def expulsao():
+        regras.expulsao("A", 3)
+        regras.definir_titulares("A", range(1, 8))  # devolve a elegibilidade
+
+    def atualizar_estado():
+        partida.equipes.mudar_estado("A", 1, "excluido")
+        partida.equipes.mudar_estado("A", 1, "jogando")
+
+    def jogadores_por_estado():
+        partida.numeros_por_estado("A", "jogando")
+        partida.numeros_por_estado("A", "banco")
+        partida.numeros_por_estado("A", "excluido")
+
+    def penalidades_ativas():
+        partida.penalidades_ativas("A", agora)
+        partida.penalidades.ha_concluidas("A", partida.linha.absoluto(agora))
+
+    def stats_to_dataframe():
+        partida.penalidades.versao += 1  # sem cache: mede a montagem inteira
+        tabela_tempos(partida.linha.retrato(agora), partida.cumprido(agora), CORES)
+
+    lista = [("definir_titulares", titulares)]
+    if banco:
+        lista += [("substituicao", substituicao), ("exclusao_2min+completou", exclusao_completou)]
+    lista += [
+        ("expulsao+titulares", expulsao),
+        ("atualizar_estado", atualizar_estado),
+        ("jogadores_por_estado", jogadores_por_estado),
+        ("_penalidades_ativas", penalidades_ativas),
+        ("_stats_to_dataframe", stats_to_dataframe),
+    ]
+    return lista
+
+
+# =============== MEDIÇÃO ===============
+def medir(funcao, tempo_alvo=0.2):
+    """ops/s (melhor de 3 rodadas) e pico de memória alocada numa chamada (bytes)."""
+    vezes, duracao = timeit.Timer(funcao).autorange()
+    vezes = max(1, int(vezes * tempo_alvo / max(duracao, 1e-9)))
+    melhor = min(timeit.repeat(funcao, number=vezes, repeat=3))
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    funcao()
+    pico = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return {"ops_s": vezes / melhor, "pico_bytes": pico}
+
+def rodar():
+    resultados = {}
+    for elenco in ELENCOS:
+        for historico in HISTORICOS:
+            for nome, funcao in casos(elenco, historico):
+                resultados[f"{nome}[elenco={elenco},pen={historico}]"] = medir(funcao)
+    return resultados
+
+def comparar(resultados, base, tolerancia):
+    """Imprime a tabela; devolve os casos mais lentos que a linha de base além da tolerância."""
+    regressoes = []
+    print(f"{'caso':<58} {'ops/s':>12} {'pico (B)':>10} {'vs base':>8}")
+    for caso, r in resultados.items():
+        ref = base.get(caso)
+        razao = r["ops_s"] / ref["ops_s"] if ref else None
+        marca = ""
+        if razao is not None and razao < 1.0 - tolerancia:
+            regressoes.append(caso)
+            marca = "  << REGRESSÃO"
+        rel = f"{razao:7.2f}x" if razao is not None else "      —"
+        print(f"{caso:<58} {r['ops_s']:>12,.0f} {r['pico_bytes']:>10,} {rel}{marca}")
+    return regressoes
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Microbenchmarks dos helpers de estado e regras do jogo.")
+    ap.add_argument("--salvar", action="store_true", help="grava as medições em bench/baseline.json")
+    ap.add_argument("--tolerancia", type=float, default=0.25, help="queda de ops/s aceita antes de acusar regressão")
+    args = ap.parse_args(argv)
+
+    resultados = rodar()
+    base = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE, encoding="utf-8") as f:
+            base = json.load(f)
+    regressoes = comparar(resultados, base, args.tolerancia)
+
+    if args.salvar:
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=1, sort_keys=True)
+        print(f"Linha de base gravada em {BASELINE}.")
+        return 0
+    if regressoes:
+        print(f"{len(regressoes)} caso(s) abaixo da linha de base.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
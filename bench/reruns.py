@@ -0,0 +1,177 @@
+# Latência de rerun ponta a ponta: roda o app.py inteiro sem navegador
+# (streamlit.testing.v1.AppTest) numa partida roteirizada e mede, a cada
+# clique, o tempo de parede do rerun, quantos iframes/componentes foram
+# emitidos e o tamanho do session_state.
+#
+#   python -m bench.reruns --saida reruns.json
+#   python -m bench.reruns --saida novo.json --comparar reruns.json
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+ELENCO = 14
+
+
+# =============== MEDIDAS ===============
+def _tamanho(obj, vistos=None):
+    """Tamanho aproximado (bytes) de um objeto e de tudo que ele referencia."""
+    vistos = set() if vistos is None else vistos
+    if id(obj) in vistos:
+        return 0
+    vistos.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    total = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        total += sum(_tamanho(k, vistos) + _tamanho(v, vistos) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        total += sum(_tamanho(x, vistos) for x in obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        total += _tamanho(vars(obj), vistos)
+    return total
+
+def _estado(at):
+    """session_state sem as chaves internas (o proxy do AppTest mudou entre versões do Streamlit)."""
+    estado = at.session_state
+    return dict(estado.items()) if hasattr(type(estado), "items") else dict(estado.filtered_state)
+
+def _iframes(at):
+    return len(at.get("iframe")) + len(at.get("component_instance"))
+
+def _rerun(at, rotulo, registros):
+    t0 = time.perf_counter()
+    at.run()
+    ms = (time.perf_counter() - t0) * 1000.0
+    if at.exception:
+        raise RuntimeError(f"{rotulo}: {at.exception[0].message}")
+    registros.append({
+        "passo": rotulo,
+        "ms": round(ms, 2),
+        "iframes": _iframes(at),
+        "session_state_bytes": _tamanho(_estado(at)),
+    })
+
+
+# =============== PARTIDA ROTEIRIZADA ===============
+def _toggle(at, rotulo):
+    return next(t for t in at.toggle if t.label.startswith(rotulo))
+
+def _aba(at, nome):
+    return at.radio(key="aba_ativa").set_value(nome)
+
+def partida(at):
+    """[(rótulo, ação)] — cada ação mexe nos widgets; o rerun é medido em seguida."""
+    passos = [("abrir", lambda: None)]
+    for eq in ("A", "B"):
+        passos += [
+            (f"elenco {eq}", lambda eq=eq: at.number_input(key=f"qtd_{eq}").set_value(ELENCO)),
+            (f"salvar {eq}", lambda eq=eq: at.button(key=f"save_team_{eq}").click()),
+        ]
+    passos.append(("aba titulares", lambda: _aba(at, "Definir Titulares")))
+    for eq in ("A", "B"):
+        passos += [
+            (f"titulares {eq}", lambda eq=eq: at.multiselect(key=f"titulares_sel_{eq}").set_value(list(range(1, 8)))),
+            (f"registrar titulares {eq}", lambda eq=eq: at.button(key=f"registrar_tit_{eq}").click()),
+        ]
+    passos += [
+        ("aba dados", lambda: _aba(at, "Visualização de Dados")),
+        ("auto-refresh", lambda: _toggle(at, "Atualizar automaticamente").set_value(True)),
+        ("aba controle", lambda: _aba(at, "Controle do Jogo")),
+        ("iniciar", lambda: at.button(key="clk_start").click()),
+    ]
+    for i in range(6):
+        eq = "AB"[i % 2]
+        sai, entra = 1 + i // 2, 8 + i // 2
+        passos += [
+            (f"sub {eq} escolher", lambda eq=eq, sai=sai, entra=entra: (
+                at.selectbox(key=f"sai_{eq}").set_value(sai), at.selectbox(key=f"entra_{eq}").set_value(entra))),
+            (f"sub {eq} confirmar", lambda eq=eq: at.button(key=f"btn_sub_{eq}").click()),
+        ]
+    for eq, num in (("A", 4), ("B", 4), ("A", 5)):
+        passos += [
+            (f"2' {eq} escolher", lambda eq=eq, num=num: at.selectbox(key=f"doismin_sel_{eq}").set_value(num)),
+            (f"2' {eq} aplicar", lambda eq=eq: at.button(key=f"btn_2min_{eq}").click()),
+        ]
+
+    def avancar_relogio():
+        # pula 2'10" de relógio de jogo (pausado) para vencer as exclusões
+        at.session_state["partida"].cronometro += 130.0
+
+    passos += [
+        ("pausar", lambda: at.button(key="clk_pause").click()),
+        ("avançar 2'10\"", avancar_relogio),
+        ("completou A", lambda: at.button(key="btn_comp_A").click()),
+        ("iniciar", lambda: at.button(key="clk_start").click()),
+        ("2º tempo", lambda: at.selectbox(key="sel_periodo").set_value("2º Tempo")),
+    ]
+    for eq in ("A", "B"):
+        passos += [
+            (f"retro {eq} escolher", lambda eq=eq: (
+                at.radio(key="retro_eq").set_value(eq), at.text_input(key="retro_tempo").set_value("00:30"))),
+            (f"retro {eq} inserir", lambda: at.button(key="retro_btn").click()),
+        ]
+    passos.append(("aba dados", lambda: _aba(at, "Visualização de Dados")))
+    return passos
+
+
+# =============== RELATÓRIO ===============
+def _resumo(registros):
+    ms = sorted(r["ms"] for r in registros)
+    return {
+        "reruns": len(ms),
+        "ms_p50": round(statistics.median(ms), 2),
+        "ms_p95": round(ms[min(len(ms) - 1, int(0.95 * len(ms)))], 2),
+        "ms_max": ms[-1],
+        "iframes_max": max(r["iframes"] for r in registros),
+        "session_state_kb_final": round(registros[-1]["session_state_bytes"] / 1024, 1),
+    }
+
+def rodar(timeout=30):
+    anterior = os.getcwd()
+    os.environ.pop("HANDEBOL_BANCO", None)
+    sys.path.insert(0, os.path.dirname(APP))
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # o diário da partida vai para um diretório descartável
+        try:
+            at = AppTest.from_file(APP, default_timeout=timeout)
+            registros = []
+            for rotulo, acao in partida(at):
+                acao()
+                _rerun(at, rotulo, registros)
+        finally:
+            os.chdir(anterior)
+    return {"resumo": _resumo(registros), "reruns": registros}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Latência de rerun do app.py numa partida roteirizada (AppTest).")
+    ap.add_argument("--saida", default="reruns.json", help="arquivo JSON do relatório")
+    ap.add_argument("--comparar", help="relatório anterior para comparar os resumos")
+    args = ap.parse_args(argv)
+
+    relatorio = rodar()
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, indent=1, ensure_ascii=False)
+
+    atual = relatorio["resumo"]
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)["resumo"]
+    for k, v in atual.items():
+        linha = f"{k:<24} {v:>10}"
+        if base and k in base and base[k]:
+            linha += f"   (antes {base[k]}, {v / base[k]:.2f}x)"
+        print(linha)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# Modo multi-partidas: várias quadras num só servidor. O diário de cada
+# partida (mesmos registros de util/diario.py) fica numa base SQLite
+# compartilhada em WAL — leitores não bloqueiam o escritor — acessada por um
+# pool de conexões. Cada sessão escolhe a partida pelo id.
+#
+# A ordem que vale é a do seq no banco. Uma sessão aplica os próprios
+# registros na hora; se outro operador gravou entre eles, a ordem local
+# diverge (marcos e níveis de desfazer empilhados de outro jeito) e a sessão
+# refaz a partida na ordem do banco.
+import json
+import os
+import queue
+import sqlite3
+import time
+from contextlib import contextmanager
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS partidas (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL,
+    criada_em REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS registros (
+    partida INTEGER NOT NULL REFERENCES partidas(id),
+    seq INTEGER NOT NULL,
+    dados TEXT NOT NULL,
+    PRIMARY KEY (partida, seq)
+) WITHOUT ROWID;
+"""
+
+
+class BancoPartidas:
+    """Pool fixo de conexões SQLite (WAL) compartilhado por todas as sessões do servidor."""
+
+    def __init__(self, caminho, tamanho=8):
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self.caminho = caminho
+        self._livres = queue.LifoQueue()
+        for _ in range(tamanho):
+            self._livres.put(self._conectar(caminho))
+        with self.conexao() as c:
+            c.executescript(_ESQUEMA)
+
+    @staticmethod
+    def _conectar(caminho):
+        # autocommit: cada INSERT é a sua própria transação curta
+        c = sqlite3.connect(caminho, timeout=5.0, isolation_level=None, check_same_thread=False)
+        c.execute("PRAGMA journal_mode=WAL")
+        c.execute("PRAGMA synchronous=NORMAL")  # em WAL, fsync só no checkpoint
+        return c
+
+    @contextmanager
+    def conexao(self):
+        c = self._livres.get()
+        try:
+            yield c
+        finally:
+            self._livres.put(c)
+
+    # =============== PARTIDAS ===============
+    def criar_partida(self, nome):
+        with self.conexao() as c:
+            return c.execute(
+                "INSERT INTO partidas (nome, criada_em) VALUES (?, ?)", (nome, time.time())
+            ).lastrowid
+
+    def partidas(self):
+        """[(id, nome)] da mais nova para a mais antiga."""
+        with self.conexao() as c:
+            return c.execute("SELECT id, nome FROM partidas ORDER BY id DESC").fetchall()
+
+    # =============== REGISTROS ===============
+    def anotar(self, partida, registro):
+        """Acrescenta um registro ao diário da partida; devolve o seq atribuído."""
+        dados = json.dumps(registro, ensure_ascii=False, separators=(",", ":"))
+        with self.conexao() as c:
+            c.execute("BEGIN IMMEDIATE")  # trava de escrita já na leitura do MAX(seq)
+            try:
+                seq = c.execute(
+                    "INSERT INTO registros (partida, seq, dados) "
+                    "SELECT ?, COALESCE(MAX(seq), 0) + 1, ? FROM registros WHERE partida = ? "
+                    "RETURNING seq",
+                    (partida, dados, partida),
+                ).fetchone()[0]
+                c.execute("COMMIT")
+            except BaseException:
+                c.execute("ROLLBACK")
+                raise
+        return seq
+
+    def registros(self, partida, desde=0):
+        """[(seq, registro)] com seq > 'desde', em ordem."""
+        with self.conexao() as c:
+            linhas = c.execute(
+                "SELECT seq, dados FROM registros WHERE partida = ? AND seq > ? ORDER BY seq",
+                (partida, desde),
+            ).fetchall()
+        return [(seq, json.loads(dados)) for seq, dados in linhas]
+
+
+class DiarioBanco:
+    """Mesma interface de util.diario.DiarioPartida, gravando no banco compartilhado."""
+
+    def __init__(self, banco, partida):
+        self.banco = banco
+        self.partida = partida
+        self._lido = 0          # último seq já aplicado nesta sessão
+        self._proprios = set()  # seqs gravados por esta sessão e ainda não lidos
+
+    def anotar(self, acao, **dados):
+        dados["acao"] = acao
+        self._proprios.add(self.banco.anotar(self.partida, dados))
+
+    def atualizar(self, partida):
+        """Aplica em 'partida' o que outras sessões gravaram desde a última leitura, na ordem do seq.
+
+        Devolve quantos registros de outras sessões chegaram (0: nada mudou).
+        """
+        lidos = self.banco.registros(self.partida, self._lido)
+        if not lidos:
+            return 0
+        pendentes = max(self._proprios, default=0)  # maior seq próprio já aplicado e ainda não lido
+        alheios = [(seq, r) for seq, r in lidos if seq not in self._proprios]
+        self._proprios.difference_update(seq for seq, _ in lidos)
+        self._lido = lidos[-1][0]
+        if alheios and alheios[0][0] < pendentes:
+            # outro operador gravou antes de um registro nosso: refaz na ordem do banco
+            partida.recomecar(r for _, r in self.banco.registros(self.partida))
+        else:
+            partida.reproduzir(r for _, r in alheios)
+        return len(alheios)
+
+    def sincronizar(self):
+        pass  # cada INSERT já é uma transação confirmada
+
+    def fechar(self):
+        pass
@@ -0,0 +1,28 @@
+import os
+import streamlit as st
+import streamlit.components.v1 as components
+
+from util.relogio import resposta_sync
+
+# Componente bidirecional: relógio + contagens de 2' num único iframe.
+# Devolve {"vencidas": [ids]} quando uma penalidade zera no cliente e
+# {"sync": t0} quando quer medir a diferença para o relógio do servidor.
+_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "componentes", "cronometro")
+_componente = components.declare_component("cronometro_partida", path=_DIR)
+
+def cronometro_partida(iniciado, base_elapsed, start_epoch, equipes, key="cronometro_partida", recebido=None, fim_periodo=None):
+    """equipes: [{"nome": str, "penalidades": [{"id", "numero", "end"}]}] na ordem de exibição.
+    start_epoch vem de util.relogio.agora(); 'recebido' é o início deste rerun (para a sincronia);
+    o alarme toca quando uma contagem zera e quando o relógio passa por 'fim_periodo'."""
+    pedido = st.session_state.get(key) or {}
+    sync = resposta_sync(pedido["sync"], recebido) if "sync" in pedido else None
+    return _componente(
+        iniciado=bool(iniciado),
+        base_elapsed=float(base_elapsed),
+        start_epoch=start_epoch,
+        equipes=equipes,
+        sync=sync,
+        fim_periodo=fim_periodo,
+        key=key,
+        default=None,
+    )
@@ -0,0 +1,112 @@
+# Diário da partida (write-ahead, JSONL): cada ação que muda o estado vira uma
+# linha gravada antes de seguir. Cada linha vai para o SO na hora (sobrevive a
+# queda do servidor); o fsync é feito em lotes para não atrasar os cliques,
+# no máximo 'intervalo' segundos depois da linha (um timer cobre o último lote).
+# Na abertura, o estado é refeito reaplicando as linhas em ordem.
+#
+# Um arquivo tem um único escritor no servidor: a sessão que abre um diário já
+# aberto (recarga da página, segunda aba) assume o arquivo e a anterior fica
+# marcada como 'assumido' — duas histórias nunca se intercalam no mesmo arquivo.
+import json
+import os
+import threading
+import time
+import weakref
+
+DIRETORIO = os.path.join("dados", "diario")
+
+_ABERTOS = weakref.WeakValueDictionary()  # caminho absoluto -> DiarioPartida que escreve nele
+_TRAVA_ABERTOS = threading.Lock()
+
+
+def _fechar_arquivo(arq):
+    """Finalizador: sincroniza e fecha (fim da sessão, coleta de lixo ou saída do processo)."""
+    if not arq.closed:
+        arq.flush()
+        os.fsync(arq.fileno())
+        arq.close()
+
+
+class DiarioPartida:
+    """Arquivo JSONL somente-acréscimo com fsync a cada 'lote' linhas ou até 'intervalo' segundos."""
+
+    def __init__(self, caminho, lote=20, intervalo=1.0):
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self.caminho = caminho
+        self.lote = lote
+        self.intervalo = intervalo
+        self.assumido = False  # outra sessão abriu este arquivo: esta não escreve mais
+        self._trava = threading.Lock()
+        self._timer = None
+        with _TRAVA_ABERTOS:
+            anterior = _ABERTOS.get(os.path.abspath(caminho))
+            if anterior is not None:
+                anterior.fechar()
+                anterior.assumido = True
+            self._arq = open(caminho, "a", encoding="utf-8")
+            _ABERTOS[os.path.abspath(caminho)] = self
+        self._finalizar = weakref.finalize(self, _fechar_arquivo, self._arq)
+        self._pendentes = 0
+        self._ultimo_sync = time.monotonic()
+
+    def anotar(self, acao, **dados):
+        if self.assumido:
+            raise RuntimeError(f"O diário {self.caminho} foi aberto por outra sessão.")
+        dados["acao"] = acao
+        with self._trava:
+            self._arq.write(json.dumps(dados, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._arq.flush()  # já está no SO: queda do processo não perde a linha
+            self._pendentes += 1
+            atrasado = time.monotonic() - self._ultimo_sync >= self.intervalo
+        if self._pendentes >= self.lote or atrasado:
+            self.sincronizar()
+        elif self._timer is None:
+            # último clique do lote: sem próximo anotar, o timer faz o fsync
+            self._timer = threading.Timer(self.intervalo, self.sincronizar)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def sincronizar(self):
+        with self._trava:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pendentes and not self._arq.closed:
+                os.fsync(self._arq.fileno())
+            self._pendentes = 0
+            self._ultimo_sync = time.monotonic()
+
+    def fechar(self):
+        self.sincronizar()
+        self._finalizar()
+
+
+# =============== ARQUIVOS ===============
+def novo_caminho(diretorio=DIRETORIO):
+    base = os.path.join(diretorio, time.strftime("partida_%Y%m%d_%H%M%S"))
+    caminho, n = base + ".jsonl", 1
+    while os.path.exists(caminho):
+        caminho, n = f"{base}_{n}.jsonl", n + 1
+    return caminho
+
+def ultimo_diario(diretorio=DIRETORIO):
+    """Diário mais recente (nomes carimbados com data/hora), ou None."""
+    if not os.path.isdir(diretorio):
+        return None
+    nomes = [n for n in os.listdir(diretorio) if n.endswith(".jsonl")]
+    return os.path.join(diretorio, max(nomes)) if nomes else None
+
+def ler(caminho):
+    """Registros do diário em ordem; uma última linha cortada pela queda é ignorada."""
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            try:
+                yield json.loads(linha)
+            except json.JSONDecodeError:
+                return
+
+
+# =============== REPRODUÇÃO ===============
+def reproduzir(partida, caminho):
+    """Reaplica o diário sobre uma util.motor.Partida recém-criada; devolve quantos registros foram lidos."""
+    return partida.reproduzir(ler(caminho))
@@ -0,0 +1,50 @@
+# Entrosamento: quanto tempo cada escalação (conjunto em quadra) e cada dupla
+# jogaram juntas. Sai das máscaras de util/escalacoes.py numa passada
+# vetorizada: duração de cada intervalo = diferença entre instantes; por
+# escalação, bincount das durações pelas máscaras distintas; por dupla, a
+# matriz de bits (intervalos × vagas) transposta vezes ela mesma ponderada
+# pelas durações. A diagonal é o tempo em quadra de cada jogador.
+import numpy as np
+
+
+def _intervalos(esc, fim):
+    """(máscaras, durações em s) dos intervalos até o instante absoluto 'fim'."""
+    ts = esc.instantes[:esc.n]
+    ok = ts < fim
+    ts, mascaras = ts[ok], esc.mascaras[:esc.n][ok]
+    return mascaras, np.diff(np.append(ts, fim))
+
+def _bits(mascaras, vagas):
+    return ((mascaras[:, None] >> np.arange(vagas, dtype=np.uint64)) & np.uint64(1)).astype(np.float64)
+
+def tempo_por_escalacao(esc, fim):
+    """[(números em quadra, segundos)] do maior para o menor; só escalações com tempo."""
+    mascaras, duracoes = _intervalos(esc, fim)
+    distintas, qual = np.unique(mascaras, return_inverse=True)
+    segundos = np.bincount(qual, weights=duracoes, minlength=len(distintas))
+    ordem = np.argsort(-segundos, kind="stable")
+    return [
+        (tuple(esc.numeros_de(int(distintas[i]))), float(segundos[i]))
+        for i in ordem if segundos[i] > 0 and distintas[i]
+    ]
+
+def matriz_pares(esc, fim):
+    """(números, matriz em segundos): [i, j] = tempo juntos em quadra; [i, i] = tempo em quadra."""
+    mascaras, duracoes = _intervalos(esc, fim)
+    bits = _bits(mascaras, len(esc.numeros))
+    return list(esc.numeros), bits.T @ (bits * duracoes[:, None])
+
+def pares(esc, fim):
+    """{(número, número): segundos} das duplas que jogaram juntas (número menor primeiro)."""
+    numeros, m = matriz_pares(esc, fim)
+    i, j = np.nonzero(np.triu(m, k=1))
+    return {tuple(sorted((numeros[a], numeros[b]))): float(m[a, b]) for a, b in zip(i, j)}
+
+def resumo_partida(partida, agora=None):
+    """Por nome de equipe: {"escalacoes": [(números, s)], "pares": {(a, b): s}} — para a temporada."""
+    agora = partida.cronometro if agora is None else agora
+    fim = partida.linha.absoluto(agora)
+    return {
+        partida.nomes[eq]: {"escalacoes": tempo_por_escalacao(esc, fim), "pares": pares(esc, fim)}
+        for eq, esc in partida.linha.escalacoes.items()
+    }
@@ -0,0 +1,89 @@
+# Quem estava em quadra: uma máscara de bits por evento de uma equipe, em
+# arrays tipados (instante absoluto float64 + máscara uint64). O bit é a vaga
+# do jogador no plantel (ordem em que apareceu), não o número da camisa.
+# Consultar um instante é uma busca binária (searchsorted); um trecho sai como
+# fatias dos arrays. Alguns KB por partida.
+#
+# Eventos retroativos entram no meio: as máscaras a partir deles são refeitas
+# com os eventos seguintes da equipe (os anteriores não mudam). O numpy é
+# importado no uso, como em util/estatisticas.py.
+from bisect import bisect_right
+
+MAX_VAGAS = 64  # bits de uma máscara uint64
+
+
+class Escalacao:
+    """Máscaras de quadra de uma equipe, uma por evento, em ordem de (abs, seq)."""
+
+    def __init__(self, capacidade=64):
+        import numpy as np
+        self.n = 0
+        self.instantes = np.zeros(capacidade, dtype=np.float64)
+        self.mascaras = np.zeros(capacidade, dtype=np.uint64)
+        self.vagas = {}      # numero -> bit
+        self.numeros = []    # bit -> numero
+        self._eventos = []   # eventos que mexem na equipe, na mesma ordem dos arrays
+        self._ordem = []     # [(abs, seq)] de _eventos, para o bisect
+
+    def vaga(self, numero):
+        numero = int(numero)
+        bit = self.vagas.get(numero)
+        if bit is None:
+            if len(self.numeros) == MAX_VAGAS:
+                raise ValueError(f"Mais de {MAX_VAGAS} jogadores numa equipe.")
+            bit = self.vagas[numero] = len(self.numeros)
+            self.numeros.append(numero)
+        return bit
+
+    def _mascara(self, anterior, ev):
+        m = 0 if ev["tipo"] == "elenco" else anterior
+        for numero, estado in ev["mudancas"]:
+            bit = 1 << self.vaga(numero)
+            m = m | bit if estado == "jogando" else m & ~bit
+        return m
+
+    # =============== EVENTOS ===============
+    def registrar(self, ev):
+        """Acrescenta o evento; se for retroativo, refaz as máscaras dali em diante."""
+        import numpy as np
+        marca = (ev["abs"], ev["seq"])
+        k = bisect_right(self._ordem, marca)
+        self._ordem.insert(k, marca)
+        self._eventos.insert(k, ev)
+        if self.n == len(self.mascaras):
+            self.instantes = np.resize(self.instantes, 2 * self.n)
+            self.mascaras = np.resize(self.mascaras, 2 * self.n)
+        self.n += 1
+        m = int(self.mascaras[k - 1]) if k else 0
+        for i in range(k, self.n):
+            m = self._mascara(m, self._eventos[i])
+            self.instantes[i] = self._ordem[i][0]
+            self.mascaras[i] = m
+
+    # =============== CONSULTAS ===============
+    def mascara_em(self, agora):
+        """Máscara em quadra no instante absoluto 'agora' (depois dos eventos desse instante)."""
+        import numpy as np
+        i = int(np.searchsorted(self.instantes[:self.n], agora, side="right")) - 1
+        return int(self.mascaras[i]) if i >= 0 else 0
+
+    def numeros_de(self, mascara):
+        return sorted(n for bit, n in enumerate(self.numeros) if mascara >> bit & 1)
+
+    def trecho(self, inicio, fim):
+        """(instantes, máscaras) das mudanças em [inicio, fim), começando pela que vale em 'inicio'."""
+        import numpy as np
+        ts = self.instantes[:self.n]
+        a = max(int(np.searchsorted(ts, inicio, side="right")) - 1, 0)
+        b = int(np.searchsorted(ts, fim, side="left"))
+        instantes = ts[a:b].copy()
+        if len(instantes):
+            instantes[0] = max(instantes[0], inicio)
+        return instantes, self.mascaras[a:b]
+
+    def amostrar(self, inicio, fim, passo=1.0):
+        """Uma máscara por 'passo' segundos em [inicio, fim) — a linha do tempo segundo a segundo."""
+        import numpy as np
+        ts = np.arange(inicio, fim, passo)
+        i = np.searchsorted(self.instantes[:self.n], ts, side="right") - 1
+        return ts, np.where(i >= 0, self.mascaras[np.maximum(i, 0)], np.uint64(0))
@@ -0,0 +1,28 @@
+# Quadro dos espectadores: a sessão do operador publica um retrato imutável
+# da partida com versão crescente; as sessões de espectador só leem. Há um
+# único quadro por servidor (st.cache_resource no app), então cada espectador
+# a mais não recalcula nada — só relê o retrato publicado.
+import threading
+from types import MappingProxyType
+
+
+class QuadroEspectadores:
+    """partida -> (versao, chave, retrato). A versão só sobe quando a chave do conteúdo muda."""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._retratos = {}
+
+    def publicar(self, partida, chave, retrato):
+        """Publica o retrato se 'chave' mudou desde a última publicação; devolve a versão vigente."""
+        with self._trava:
+            versao, ultima, _ = self._retratos.get(partida, (0, None, None))
+            if chave == ultima:
+                return versao
+            self._retratos[partida] = (versao + 1, chave, MappingProxyType(dict(retrato)))
+            return versao + 1
+
+    def ler(self, partida):
+        """(versao, retrato) — (0, None) enquanto o operador não publicou nada."""
+        versao, _, retrato = self._retratos.get(partida, (0, None, None))
+        return versao, retrato
@@ -0,0 +1,24 @@
+# Arquivos estáticos do app (pasta static/, servida pelo Streamlit em
+# app/static/ com server.enableStaticServing): o navegador baixa a folha de
+# estilos uma vez e a guarda em cache; cada rerun reenvia só a tag <link>,
+# com o hash do conteúdo na URL para invalidar o cache quando o arquivo muda.
+# Sem static serving, cai para o <style> embutido.
+import hashlib
+import os
+from functools import lru_cache
+
+DIRETORIO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+
+
+@lru_cache(maxsize=None)
+def _arquivo(nome):
+    with open(os.path.join(DIRETORIO, nome), encoding="utf-8") as f:
+        texto = f.read()
+    return texto, hashlib.sha256(texto.encode("utf-8")).hexdigest()[:12]
+
+def folha_estilos(nome="estilos.css", servido=True):
+    """HTML que aplica a folha: <link> para o arquivo servido (com hash) ou o <style> inteiro."""
+    texto, hash_ = _arquivo(nome)
+    if servido:
+        return f"<link rel='stylesheet' href='app/static/{nome}?v={hash_}'>"
+    return f"<style>{texto}</style>"
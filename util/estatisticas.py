@@ -0,0 +1,109 @@
+# Estatísticas por jogador em colunas pré-alocadas (NumPy). Cada linha é um
+# (equipe, número); os intervalos fechados ficam na matriz 'tempos' e o
+# intervalo aberto em (estado, desde). O retrato de um instante sai numa
+# única passada vetorizada. O numpy só é importado quando as colunas são
+# criadas: importar util.motor não paga o import dele.
+COLUNAS = ("jogado_1t", "jogado_2t", "banco", "doismin")
+ESTADOS = ("banco", "jogando", "excluido", "expulso")
+_COD_ESTADO = {e: i for i, e in enumerate(ESTADOS)}
+_SEM_ESTADO = -1
+
+# coluna de 'tempos' que cada estado alimenta, por período (-1 = não acumula)
+_DESTINO = {
+    "1º Tempo": (2, 0, 3, -1),
+    "2º Tempo": (2, 1, 3, -1),
+}
+
+
+class EstatisticasColunares:
+    """Colunas: equipe, numero, tempos (s) por COLUNAS, exclusoes, estado, desde."""
+
+    def __init__(self, capacidade=64):
+        import numpy as np
+        self.n = 0
+        self.equipe = np.empty(capacidade, dtype=object)
+        self.numero = np.zeros(capacidade, dtype=np.int32)
+        self.tempos = np.zeros((capacidade, len(COLUNAS)), dtype=np.float64)
+        self.exclusoes = np.zeros(capacidade, dtype=np.int32)
+        self.estado = np.full(capacidade, _SEM_ESTADO, dtype=np.int8)
+        self.desde = np.zeros(capacidade, dtype=np.float64)
+        self._linhas = {}  # (eq, numero) -> índice
+
+    def _crescer(self):
+        import numpy as np
+        cap = 2 * len(self.numero)
+        for nome in ("equipe", "numero", "tempos", "exclusoes", "estado", "desde"):
+            antigo = getattr(self, nome)
+            novo = np.empty((cap,) + antigo.shape[1:], dtype=antigo.dtype)
+            novo[:self.n] = antigo[:self.n]
+            setattr(self, nome, novo)
+        self.tempos[self.n:] = 0.0
+        self.exclusoes[self.n:] = 0
+        self.estado[self.n:] = _SEM_ESTADO
+
+    # =============== LINHAS ===============
+    def indice(self, eq, numero, criar=True):
+        chave = (eq, int(numero))
+        i = self._linhas.get(chave)
+        if i is None and criar:
+            if self.n == len(self.numero):
+                self._crescer()
+            i = self.n
+            self.equipe[i], self.numero[i] = eq, int(numero)
+            self._linhas[chave] = i
+            self.n += 1
+        return i
+
+    def indices_equipe(self, eq):
+        return [i for (e, _), i in self._linhas.items() if e == eq]
+
+    # =============== INTERVALOS ===============
+    def fechar(self, i, agora, periodo):
+        """Credita o intervalo aberto da linha até 'agora'; devolve o estado que estava aberto."""
+        cod = int(self.estado[i])
+        if cod != _SEM_ESTADO:
+            col = _DESTINO[periodo][cod]
+            if col >= 0:
+                self.tempos[i, col] += max(0.0, agora - self.desde[i])
+        self.estado[i] = _SEM_ESTADO
+        return ESTADOS[cod] if cod != _SEM_ESTADO else None
+
+    def abrir(self, i, estado, agora):
+        self.estado[i] = _COD_ESTADO.get(estado, _SEM_ESTADO)
+        self.desde[i] = agora
+
+    def estado_de(self, i):
+        cod = int(self.estado[i])
+        return ESTADOS[cod] if cod != _SEM_ESTADO else None
+
+    def limpar(self, i):
+        """Zera a linha (tempos, exclusões, intervalo aberto) para recalculá-la do início."""
+        self.tempos[i] = 0.0
+        self.exclusoes[i] = 0
+        self.estado[i] = _SEM_ESTADO
+
+    # =============== RETRATO ===============
+    def tempos_em(self, agora, periodo, linhas=None):
+        """Matriz de tempos (s) com o intervalo aberto incluído até 'agora' (vetorizado)."""
+        import numpy as np
+        linhas = np.arange(self.n) if linhas is None else np.asarray(linhas, dtype=np.intp)
+        tempos = self.tempos[linhas].copy()
+        cod = self.estado[linhas]
+        abertos = cod != _SEM_ESTADO
+        col = np.full(len(linhas), -1, dtype=np.int8)
+        col[abertos] = np.array(_DESTINO[periodo], dtype=np.int8)[cod[abertos]]
+        ok = col >= 0
+        tempos[np.nonzero(ok)[0], col[ok]] += np.maximum(0.0, agora - self.desde[linhas][ok])
+        return tempos
+
+    def retrato(self, agora, periodo):
+        """Colunas do instante 'agora' para as linhas com estado aberto (plantel atual)."""
+        import numpy as np
+        linhas = np.nonzero(self.estado[:self.n] != _SEM_ESTADO)[0]
+        return {
+            "equipe": self.equipe[linhas],
+            "numero": self.numero[linhas],
+            "estado": np.asarray(ESTADOS, dtype=object)[self.estado[linhas]],
+            "exclusoes": self.exclusoes[linhas],
+            "tempos": self.tempos_em(agora, periodo, linhas),
+        }
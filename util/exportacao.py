@@ -0,0 +1,75 @@
+# Exportação colunar (Parquet) das partidas encerradas: cada partida vira um
+# arquivo por equipe em dados/parquet/data=AAAA-MM-DD/equipe=<nome>/, o layout
+# de partições que pyarrow, pandas e duckdb leem como um único dataset.
+# Exportar só acrescenta arquivos — nada do que já foi gravado é relido.
+import datetime
+import os
+import re
+from urllib.parse import quote
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # opcional: sem pyarrow o app oferece só o CSV
+    pa = None
+
+from util.registros import linhas_partida
+
+DIRETORIO = os.path.join("dados", "parquet")
+_DATA_NO_ID = re.compile(r"(\d{4})(\d{2})(\d{2})")  # partida_AAAAMMDD_HHMMSS (util/diario.py)
+
+
+def disponivel():
+    return pa is not None
+
+def data_partida(partida_id):
+    """Data da partida tirada do id carimbado pelo diário; hoje, se o id não tiver data."""
+    m = _DATA_NO_ID.search(str(partida_id))
+    return f"{m[1]}-{m[2]}-{m[3]}" if m else datetime.date.today().isoformat()
+
+
+# =============== ESCRITA ===============
+def _tabela(partida_id, linhas):
+    return pa.table({
+        "partida": pa.array([partida_id] * len(linhas), pa.string()),
+        "jogador": pa.array([l["numero"] for l in linhas], pa.int16()),
+        "jogado_1t": pa.array([l["jogado_1t"] for l in linhas], pa.float64()),
+        "jogado_2t": pa.array([l["jogado_2t"] for l in linhas], pa.float64()),
+        "banco": pa.array([l["banco"] for l in linhas], pa.float64()),
+        "doismin": pa.array([l["doismin"] for l in linhas], pa.float64()),
+        "exclusoes": pa.array([l["exclusoes"] for l in linhas], pa.int8()),
+        "expulso": pa.array([bool(l["expulsoes"]) for l in linhas], pa.bool_()),
+    })
+
+def exportar_linhas(partida_id, linhas, diretorio=DIRETORIO, data=None):
+    """Grava as linhas de registros.linhas_partida (segundos) por equipe; devolve os arquivos escritos."""
+    if pa is None:
+        raise RuntimeError("A exportação Parquet precisa do pacote pyarrow.")
+    data = data or data_partida(partida_id)
+    por_equipe = {}
+    for l in linhas:
+        por_equipe.setdefault(l["equipe"], []).append(l)
+    arquivos = []
+    for equipe, ls in por_equipe.items():
+        # o nome vai na partição (hive, codificado como URI), não nas colunas
+        pasta = os.path.join(diretorio, f"data={data}", f"equipe={quote(equipe, safe='')}")
+        os.makedirs(pasta, exist_ok=True)
+        caminho = os.path.join(pasta, f"{quote(str(partida_id), safe='')}.parquet")
+        pq.write_table(_tabela(str(partida_id), ls), caminho + ".tmp", compression="zstd")
+        os.replace(caminho + ".tmp", caminho)  # reexportar a mesma partida substitui, não duplica
+        arquivos.append(caminho)
+    return arquivos
+
+def exportar_partida(partida, partida_id, diretorio=DIRETORIO):
+    """Exporta o estado atual de uma util.motor.Partida (normalmente ao fim do jogo)."""
+    return exportar_linhas(partida_id, linhas_partida(partida, partida.tempo()), diretorio)
+
+
+# =============== LEITURA ===============
+def ler(diretorio=DIRETORIO, colunas=None, filtro=None):
+    """Temporada inteira (ou o recorte de 'filtro', ex.: ds.field("equipe") == "X") como DataFrame."""
+    if pa is None:
+        raise RuntimeError("A leitura Parquet precisa do pacote pyarrow.")
+    dataset = ds.dataset(diretorio, format="parquet", partitioning="hive")
+    return dataset.to_table(columns=colunas, filter=filtro).to_pandas()
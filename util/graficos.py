@@ -0,0 +1,104 @@
+# Gráficos de minutos da aba de dados (componentes/graficos): barras empilhadas
+# por jogador (1ºT, 2ºT, banco, 2') e o tempo em quadra acumulado ao longo do
+# jogo. As figuras ficam no navegador; a cada rerun vão só os números das
+# barras, os pontos novos das curvas (quebras: entrou/saiu) e a ponta atual de
+# cada curva — nada de figura inteira serializada a cada segundo.
+#
+# O plotly.js sai do próprio pacote plotly e é copiado para a pasta do
+# componente: servido pelo Streamlit, guardado em cache, funciona sem internet.
+# Em deploy com o código só de leitura, gere o arquivo no build
+# (python -m util.graficos); se ele faltar e não der para gravar, o componente
+# carrega a mesma versão da CDN do plotly.
+import logging
+import os
+import tempfile
+
+import plotly
+import plotly.offline
+import streamlit as st
+import streamlit.components.v1 as components
+
+_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "componentes", "graficos")
+PLOTLY_JS = f"plotly-{plotly.__version__}.min.js"  # versão no nome: atualizar o pacote fura o cache
+PLOTLY_CDN = f"https://cdn.plot.ly/{PLOTLY_JS}"
+
+
+def _garantir_plotly():
+    """Nome do plotly.js para o componente: o arquivo local ou, se não der para gravá-lo, a CDN."""
+    caminho = os.path.join(_DIR, PLOTLY_JS)
+    if os.path.exists(caminho):
+        return PLOTLY_JS
+    try:
+        fd, tmp = tempfile.mkstemp(prefix=PLOTLY_JS, suffix=".tmp", dir=_DIR)  # um por processo
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(plotly.offline.get_plotlyjs())
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, caminho)  # processos concorrentes: o último troca por um arquivo igual
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError as e:
+        logging.getLogger(__name__).warning("plotly.js local indisponível (%s); usando %s", e, PLOTLY_CDN)
+        return PLOTLY_CDN
+    return PLOTLY_JS
+
+_plotly = _garantir_plotly()
+_componente = components.declare_component("graficos_minutos", path=_DIR)
+
+
+def _id(eq, numero):
+    return f"{eq}#{int(numero)}"
+
+def dados_barras(df, nomes):
+    """Colunas das barras a partir do DataFrame de util.relatorio.tabela_tempos (minutos)."""
+    return {
+        "rotulos": [f"{nomes[eq]} #{int(n)}" for eq, n in zip(df["Equipe"], df["Número"])],
+        "jogado_1t": df["Jogado 1ºT (min)"].tolist(),
+        "jogado_2t": df["Jogado 2ºT (min)"].tolist(),
+        "banco": df["Banco (min)"].tolist(),
+        "doismin": df["2 min (min)"].tolist(),
+    }
+
+def graficos_minutos(df, curvas, agora_abs, geracao, periodos, nomes, key="graficos_minutos"):
+    """df: tabela_tempos; curvas: LinhaDoTempo.curvas_quadra() (segundos); agora_abs: instante absoluto.
+
+    'geracao' muda quando o passado das curvas muda (retroativo, desfazer): aí tudo é reenviado.
+    O cliente também pede tudo ({"reset": n}) ao montar ou se perder um rerun.
+    """
+    pedido = (st.session_state.get(key) or {}).get("reset")
+    enviado = st.session_state.get(f"_{key}_enviado")  # (geracao, reset atendido, {id: pontos enviados})
+    completo = enviado is None or enviado[:2] != (geracao, pedido)
+    ja = {} if completo else enviado[2]
+
+    novos, base, total = {}, {}, {}
+    for (eq, n), pts in curvas.items():
+        i = _id(eq, n)
+        total[i] = len(pts)
+        if len(pts) > ja.get(i, 0):
+            novos[i] = [(t / 60.0, s / 60.0) for t, s in pts[ja.get(i, 0):]]
+            base[i] = ja.get(i, 0)
+    st.session_state[f"_{key}_enviado"] = (geracao, pedido, total)
+
+    ids = [_id(eq, n) for eq, n in zip(df["Equipe"], df["Número"])]
+    pontas = {
+        i: (agora_abs / 60.0, float(m))
+        for i, m in zip(ids, df["Jogado Total (min)"]) if i in total
+    }
+    return _componente(
+        barras=dados_barras(df, nomes),
+        novos=novos,
+        base=base,
+        completo=completo,
+        pontas=pontas,
+        rotulos={i: f"{nomes[i[0]]} #{i[2:]}" for i in ids},
+        cores=dict(zip(ids, df["CorEquipe"])),
+        periodos=[t / 60.0 for t in periodos],
+        plotly=_plotly,
+        key=key,
+        default=None,
+    )
+
+
+if __name__ == "__main__":  # build: python -m util.graficos
+    print(_garantir_plotly())
@@ -0,0 +1,205 @@
+# Linha do tempo da partida: log de eventos (somente acréscimo) carimbado com
+# o relógio de jogo. Os tempos por jogador saem de intervalos fechados,
+# acumulados de forma incremental a cada evento — nada depende de reruns.
+#
+# Eventos retroativos (com 'desde' e 'periodo') entram na ordem do tempo no
+# instante em que aconteceram: cada jogador tem seus eventos ordenados por
+# instante absoluto (bisect) e só os jogadores tocados são recalculados, a
+# partir dos próprios eventos — o custo não cresce com as correções anteriores.
+import heapq
+from bisect import insort
+
+from util.escalacoes import Escalacao
+from util.estatisticas import COLUNAS, EstatisticasColunares
+
+PRIMEIRO_TEMPO = "1º Tempo"
+SEGUNDO_TEMPO = "2º Tempo"
+DURACAO_PERIODO = 30 * 60.0
+
+TIPOS_EVENTO = (
+    "inicio", "pausa", "zerar", "periodo", "elenco", "titulares",
+    "substituicao", "doismin", "completou", "expulsao", "retro",
+)
+
+def totais_zerados():
+    return {c: 0.0 for c in COLUNAS}
+
+def chave_jogado(periodo):
+    return "jogado_1t" if periodo == PRIMEIRO_TEMPO else "jogado_2t"
+
+
+class LinhaDoTempo:
+    """Log de eventos da partida + totais por jogador (em segundos de relógio de jogo)."""
+
+    def __init__(self, periodo=PRIMEIRO_TEMPO):
+        self.eventos = []     # ordem de registro (seq); 'abs' dá a ordem no tempo
+        self.periodo = periodo
+        self._periodo_inicial = periodo
+        self._base = 0.0      # relógio acumulado antes do último "zerar"
+        self._ultimo = 0.0    # instante absoluto do último evento ao vivo
+        self._trechos = [(0.0, 0.0, periodo)]  # (início absoluto, base, período) a cada "periodo"/"zerar"
+        self._por_jogador = {}  # (eq, numero) -> [(abs, seq)] ordenado
+        self._gerais = []       # [(abs, seq)] de "periodo" e "elenco", que valem para vários jogadores
+        self.reescritas = 0     # eventos retroativos: o passado mudou (curvas já enviadas perdem a validade)
+        self.stats = EstatisticasColunares()  # totais fechados + intervalo aberto por jogador
+        self.escalacoes = {}    # eq -> Escalacao: máscara de quem está em quadra a cada evento
+
+    # =============== RELÓGIO ===============
+    def absoluto(self, t):
+        """Converte o relógio exibido em tempo absoluto da partida (sobrevive a 'zerar')."""
+        return max(self._base + float(t), self._ultimo)
+
+    def inicio_periodo(self):
+        """Leitura do relógio quando o período atual começou (0 depois de 'zerar')."""
+        inicio, base, _ = self._trechos[-1]
+        return inicio - base
+
+    def absoluto_em(self, t, periodo, agora):
+        """Instante absoluto em que o relógio marcou 't' dentro de 'periodo', até o relógio 'agora'; None se não houve."""
+        fim = self.absoluto(agora)
+        for inicio, base, per in reversed(self._trechos):
+            quando = base + float(t)
+            if per == periodo and inicio <= quando <= fim:
+                return quando
+            fim = inicio
+        return None
+
+    # =============== EVENTOS ===============
+    def registrar(self, tipo, t, equipe=None, mudancas=(), **dados):
+        """Acrescenta um evento no instante 't' do relógio e aplica suas mudanças de estado.
+
+        Com 'desde' (e 'periodo') nos dados o evento é retroativo: vale a partir
+        do instante em que o relógio marcou 'desde' naquele período.
+        """
+        retro = "desde" in dados
+        if retro:
+            quando = self.absoluto_em(dados["desde"], dados.get("periodo", self.periodo), t)
+            if quando is None:
+                raise ValueError(f"{dados['desde']}s não aconteceu no {dados.get('periodo', self.periodo)}")
+        evento = {
+            "seq": len(self.eventos),
+            "tipo": tipo,
+            "t": float(t),
+            "abs": quando if retro else self.absoluto(t),
+            "equipe": equipe,
+            "mudancas": [(int(n), e) for n, e in mudancas],
+        }
+        evento.update(dados)
+        self.eventos.append(evento)
+        self._indexar(evento)
+        if equipe is not None and (evento["mudancas"] or tipo == "elenco"):
+            self.escalacoes.setdefault(equipe, Escalacao()).registrar(evento)
+        if retro:
+            self.reescritas += 1
+            for numero in dict.fromkeys(n for n, _ in evento["mudancas"]):
+                self._recalcular(equipe, numero)
+        else:
+            self._aplicar(evento)
+        return evento
+
+    def _indexar(self, ev):
+        marca = (ev["abs"], ev["seq"])
+        if ev["tipo"] in ("periodo", "elenco"):
+            insort(self._gerais, marca)
+            return
+        for numero, _ in ev["mudancas"]:
+            insort(self._por_jogador.setdefault((ev["equipe"], numero), []), marca)
+
+    def _aplicar(self, ev):
+        agora = ev["abs"]
+        self._ultimo = agora
+        tipo, eq = ev["tipo"], ev["equipe"]
+
+        st = self.stats
+        if tipo == "periodo":
+            # fecha tudo no período antigo e reabre no novo
+            for i in range(st.n):
+                estado = st.fechar(i, agora, self.periodo)
+                if estado is not None:
+                    st.abrir(i, estado, agora)
+            self.periodo = ev["periodo"]
+            self._trechos.append((agora, self._base, self.periodo))
+        elif tipo == "zerar":
+            self._base = agora
+            self._trechos.append((agora, agora, self.periodo))
+        elif tipo == "elenco":
+            for i in st.indices_equipe(eq):
+                st.fechar(i, agora, self.periodo)
+
+        for numero, estado in ev["mudancas"]:
+            i = st.indice(eq, numero)
+            st.fechar(i, agora, self.periodo)
+            st.abrir(i, estado, agora)
+            if tipo == "doismin":
+                st.exclusoes[i] += 1
+
+    def _recalcular(self, eq, numero):
+        """Refaz a linha do jogador do zero, com os eventos dele e os gerais em ordem de tempo."""
+        st = self.stats
+        i = st.indice(eq, numero)
+        st.limpar(i)
+        periodo = self._periodo_inicial
+        for agora, seq in heapq.merge(self._por_jogador.get((eq, numero), ()), self._gerais):
+            ev = self.eventos[seq]
+            if ev["tipo"] == "periodo":
+                estado = st.fechar(i, agora, periodo)
+                if estado is not None:
+                    st.abrir(i, estado, agora)
+                periodo = ev["periodo"]
+                continue
+            if ev["equipe"] != eq:
+                continue
+            if ev["tipo"] == "elenco":
+                st.fechar(i, agora, periodo)
+            for n, estado in ev["mudancas"]:
+                if n == numero:
+                    st.fechar(i, agora, periodo)
+                    st.abrir(i, estado, agora)
+                    if ev["tipo"] == "doismin":
+                        st.exclusoes[i] += 1
+
+    # =============== CONSULTAS ===============
+    def estado(self, eq, numero):
+        i = self.stats.indice(eq, numero, criar=False)
+        return None if i is None else self.stats.estado_de(i)
+
+    def totais(self, eq, numero, t):
+        """Totais do jogador no instante 't' (intervalo aberto incluído até 't')."""
+        i = self.stats.indice(eq, numero, criar=False)
+        if i is None:
+            return totais_zerados()
+        linha = self.stats.tempos_em(self.absoluto(t), self.periodo, [i])[0]
+        return dict(zip(COLUNAS, linha.tolist()))
+
+    def totais_equipe(self, eq, t):
+        return {int(self.stats.numero[i]): self.totais(eq, self.stats.numero[i], t) for i in self.stats.indices_equipe(eq)}
+
+    def em_quadra(self, eq, agora):
+        """Números em quadra no instante absoluto 'agora' (busca binária nas máscaras)."""
+        esc = self.escalacoes.get(eq)
+        return [] if esc is None else esc.numeros_de(esc.mascara_em(agora))
+
+    def curvas_quadra(self):
+        """(eq, numero) -> [(instante absoluto, segundos em quadra)] só nas quebras (entrou/saiu).
+
+        Entre duas quebras a curva é reta; o ponto atual sai do retrato (jogado 1ºT + 2ºT).
+        """
+        curvas, desde, total = {}, {}, {}
+        for ev in sorted(self.eventos, key=lambda e: (e["abs"], e["seq"])):  # já quase ordenado
+            agora, eq = ev["abs"], ev["equipe"]
+            mudancas = dict(ev["mudancas"])
+            saem = [k for k in desde if k[0] == eq and k[1] not in mudancas] if ev["tipo"] == "elenco" else []
+            for chave in saem + [(eq, n) for n in mudancas]:
+                estava, entra = chave in desde, mudancas.get(chave[1]) == "jogando"
+                if estava == entra:
+                    continue  # banco -> 2' etc.: a curva não dobra
+                if estava:
+                    total[chave] = total.get(chave, 0.0) + agora - desde.pop(chave)
+                else:
+                    desde[chave] = agora
+                curvas.setdefault(chave, []).append((agora, total.get(chave, 0.0)))
+        return curvas
+
+    def retrato(self, t):
+        """Colunas de todos os jogadores do plantel atual no instante 't' (uma amostra de relógio)."""
+        return self.stats.retrato(self.absoluto(t), self.periodo)
@@ -0,0 +1,446 @@
+# Motor da partida, sem Streamlit: regras (titulares, substituição, 2',
+# completou, expulsão, retroativa), relógio de jogo, plantel, linha do tempo
+# e agenda de penalidades. O app.py é só um adaptador de tela por cima dele;
+# lotes, testes e outras interfaces usam a mesma classe.
+#
+# Toda mudança de estado passa por _fazer(acao, ...): aplica o registro e o
+# entrega ao diário (util/diario.py ou util/banco.py). Reproduzir um diário é
+# chamar aplicar() com os mesmos registros — ou reproduzir(), que resolve os
+# desfazer só nas listas e refaz o estado uma vez no fim.
+#
+# Desfazer/refazer: o estado de cada nível é um prefixo da lista de registros
+# (compartilhada por todos os níveis — um nível custa um índice, não uma
+# cópia). Cada ação do operador abre o nível com um registro "marco";
+# "desfazer" corta o último nível e refaz o estado reaplicando o prefixo.
+# No banco compartilhado vale a ordem do seq (util/banco.py): desfazer e
+# refazer levam o tamanho da pilha que o operador viu e, se outro operador
+# mexeu nela antes, não valem — igual em todas as sessões.
+import functools
+
+from util.linha_tempo import DURACAO_PERIODO, LinhaDoTempo, PRIMEIRO_TEMPO
+from util.penalidades import DURACAO_2MIN, AgendaPenalidades
+from util.plantel import EQUIPES, Plantel
+from util.relogio import agora
+
+CORES_PADRAO = {"A": "#00AEEF", "B": "#EC008C"}
+ROTULOS_ACAO = {
+    "iniciar": "Iniciar", "pausar": "Pausar", "zerar": "Zerar", "mudar_periodo": "Período",
+    "definir_equipe": "Salvar equipe", "definir_cor": "Cor da equipe", "definir_titulares": "Titulares", "corrigir_titulares": "Corrigir titulares",
+    "substituicao": "Substituição", "exclusao_2min": "2 minutos", "completou": "Completou",
+    "expulsao": "Expulsão", "retro": "Substituição retroativa",
+}
+
+
+def _desfazivel(metodo):
+    """Ação do operador: tudo o que ela gravar é desfeito de uma vez."""
+    @functools.wraps(metodo)
+    def acao(self, *args, **kwargs):
+        if self._marco is not None:  # chamada de dentro de outra ação: mesmo nível
+            return metodo(self, *args, **kwargs)
+        self._marco = metodo.__name__
+        try:
+            return metodo(self, *args, **kwargs)
+        finally:
+            self._marco = None
+    return acao
+
+
+class Partida:
+    """Estado completo de uma partida + operações do controle do jogo."""
+
+    def __init__(self, equipes=EQUIPES, diario=None, relogio=agora):
+        self.diario = diario        # qualquer objeto com anotar(acao, **dados); None = sem diário
+        self.relogio = relogio
+        self.registros = []         # registros de estado vigentes, em ordem (sem marcos/desfazer)
+        self.revisao = 0            # sobe a cada registro aplicado, inclusive ao desfazer
+        self.reconstrucoes = 0      # desfazer refaz a linha do tempo do zero
+        self._equipes = tuple(equipes)
+        self._niveis = []           # [(início em 'registros', nome da ação)]
+        self._refazer = []          # [(nome, registros)] dos níveis desfeitos
+        self._marco = None
+        self._lote = None           # dentro de reproduzir(): menor corte de desfazer ainda não refeito
+        self._callbacks = []
+        self._novo_estado()
+
+    def _novo_estado(self):
+        equipes = self._equipes
+        self.equipes = Plantel(equipes)
+        self.linha = LinhaDoTempo()
+        self.penalidades = AgendaPenalidades(equipes)
+        self.titulares_definidos = {eq: False for eq in equipes}
+        self.nomes = {eq: f"Equipe {eq}" for eq in equipes}
+        self.cores = {eq: CORES_PADRAO.get(eq, "#333") for eq in equipes}
+        self.iniciado = False
+        self.cronometro = 0.0       # relógio acumulado até o último início
+        self.ultimo_tick = self.relogio()
+        self.periodo = PRIMEIRO_TEMPO
+
+    @property
+    def stats(self):
+        return self.linha.stats
+
+    def ao_vencer(self, callback):
+        """callback(penalidade) quando um 2' vence; continua valendo depois de desfazer."""
+        self._callbacks.append(callback)
+        self.penalidades.ao_vencer(callback)
+
+    # =============== RELÓGIO ===============
+    def tempo(self):
+        """Relógio de jogo (s): acumulado + trecho corrente se estiver rodando."""
+        if self.iniciado:
+            return self.cronometro + (self.relogio() - self.ultimo_tick)
+        return self.cronometro
+
+    def fim_periodo(self):
+        """Leitura do relógio em que o período atual completa 30 minutos."""
+        return self.linha.inicio_periodo() + DURACAO_PERIODO
+
+    @_desfazivel
+    def iniciar(self):
+        if self.iniciado:
+            return False
+        self.iniciado = True
+        self.ultimo_tick = self.relogio()
+        self._evento("inicio")
+        self._anotar_relogio()
+        return True
+
+    @_desfazivel
+    def pausar(self):
+        if not self.iniciado:
+            return False
+        self.cronometro += self.relogio() - self.ultimo_tick
+        self.iniciado = False
+        self._evento("pausa")
+        self._anotar_relogio()
+        return True
+
+    @_desfazivel
+    def zerar(self):
+        self._evento("zerar")  # antes de zerar: a linha do tempo guarda o relógio anterior
+        self.iniciado = False
+        self.cronometro = 0.0
+        self.ultimo_tick = self.relogio()
+        self._anotar_relogio()
+
+    @_desfazivel
+    def mudar_periodo(self, periodo):
+        if periodo == self.periodo:
+            return False
+        self.periodo = periodo
+        self._evento("periodo", periodo=periodo)
+        self._anotar_relogio()
+        return True
+
+    # =============== CADASTRO ===============
+    @_desfazivel
+    def definir_equipe(self, eq, numeros, nome=None, cor=None):
+        """Substitui o plantel (sem duplicatas) e põe todos no banco; devolve os números salvos."""
+        numeros = list(dict.fromkeys(int(n) for n in numeros))
+        self._fazer("equipe", equipe=eq, numeros=numeros, nome=nome or self.nomes[eq], cor=cor or self.cores[eq])
+        self._evento("elenco", eq, [(n, "banco") for n in numeros])
+        return numeros
+
+    @_desfazivel
+    def definir_cor(self, eq, cor):
+        if cor == self.cores[eq]:
+            return False
+        self._fazer("cor", equipe=eq, cor=cor)
+        return True
+
+    @_desfazivel
+    def definir_titulares(self, eq, titulares):
+        titulares = set(map(int, titulares))
+        if not titulares:
+            return False, "Selecione pelo menos 1 titular."
+        numeros = [j["numero"] for j in self.equipes.jogadores(eq)]
+        self._fazer("elegivel", equipe=eq, numeros=numeros, valor=True)
+        self._evento("titulares", eq, [(n, "jogando" if n in titulares else "banco") for n in numeros])
+        self._fazer("titulares_definidos", equipe=eq, valor=True)
+        return True, f"Titulares de {self.nomes[eq]} registrados."
+
+    @_desfazivel
+    def corrigir_titulares(self, eq):
+        self._fazer("titulares_definidos", equipe=eq, valor=False)
+
+    # =============== REGRAS ===============
+    def _no_elenco(self, eq, *numeros):
+        """Todos os números escolhidos existem no plantel (seleção vazia chega como None)."""
+        return all(n is not None and self.equipes.jogador(eq, n) is not None for n in numeros)
+
+    @_desfazivel
+    def substituicao(self, eq, sai, entra):
+        if not (self._no_elenco(eq, sai, entra) and self.equipes.esta(eq, sai, "jogando") and self.equipes.elegivel(eq, sai)
+                and self.equipes.esta(eq, entra, "banco") and self.equipes.elegivel(eq, entra)):
+            return False, "Seleção inválida para substituição."
+        self._evento("substituicao", eq, [(sai, "banco"), (entra, "jogando")])
+        return True, f"Substituição: Sai {sai} / Entra {entra}"
+
+    @_desfazivel
+    def exclusao_2min(self, eq, numero, desde=None, periodo=None):
+        """2' agora ou, com 'desde'/'periodo', a partir de uma marca anterior do relógio."""
+        if not self._no_elenco(eq, numero) or not self.equipes.elegivel(eq, numero):
+            return False, "Jogador não pode receber 2 minutos."
+        if desde is None:
+            ev = self._evento("doismin", eq, [(numero, "excluido")])
+            self._fazer("penalidade", equipe=eq, numero=int(numero), inicio=ev["abs"], absoluto=True)
+            return True, f"Jogador {numero} excluído por 2 minutos."
+        erro = self._validar_retro(desde, periodo)
+        if erro:
+            return False, erro
+        # A agenda anda no tempo absoluto: depois de 'zerar', um 2' do período
+        # anterior não vira penalidade futura. Se já venceu, fecha aqui mesmo:
+        # o jogador volta em desde + 2' ao estado que tinha antes da correção.
+        agora = self.linha.absoluto(self.tempo())
+        quando = self.linha.absoluto_em(float(desde), periodo, self.tempo())
+        fim = quando + DURACAO_2MIN
+        vencida = fim <= agora and self.linha.absoluto_em(float(desde) + DURACAO_2MIN, periodo, self.tempo()) == fim
+        if vencida:
+            volta = "jogando" if int(numero) in self.linha.em_quadra(eq, fim) else "banco"
+        self._evento("doismin", eq, [(numero, "excluido")], desde=float(desde), periodo=periodo)
+        self._fazer("penalidade", equipe=eq, numero=int(numero), inicio=quando, absoluto=True, consumida=vencida)
+        if not vencida:
+            return True, f"Jogador {numero} excluído por 2 minutos."
+        self._evento("completou", eq, [(numero, volta)], desde=float(desde) + DURACAO_2MIN, periodo=periodo)
+        return True, f"Jogador {numero}: 2 minutos já cumpridos registrados."
+
+    @_desfazivel
+    def completou(self, eq, numero):
+        """Consome a exclusão vencida mais antiga da equipe e põe 'numero' em quadra."""
+        if not self._no_elenco(eq, numero):
+            return False, "Selecione o jogador que entra."
+        agora = self.linha.absoluto(self.tempo())
+        if not self.penalidades.ha_concluidas(eq, agora):
+            return False, "Ainda não há exclusões concluídas (2' completos). Aguarde."
+        self._fazer("completou", equipe=eq, agora=agora, absoluto=True)
+        self._evento("completou", eq, [(numero, "jogando")])
+        return True, f"Jogador {numero} entrou após 2'."
+
+    @_desfazivel
+    def expulsao(self, eq, numero):
+        if not self._no_elenco(eq, numero):
+            return False, "Não foi possível expulsar o jogador selecionado."
+        self._fazer("elegivel", equipe=eq, numeros=[int(numero)], valor=False)
+        self._evento("expulsao", eq, [(numero, "expulso")])
+        return True, f"Jogador {numero} expulso."
+
+    @_desfazivel
+    def retro(self, eq, sai, entra, desde, periodo):
+        """Troca feita no instante 'desde' do período e só lançada agora; devolve (ok, msg, dt).
+
+        A troca entra na linha do tempo naquele instante: exclusões, trocas e
+        mudança de período posteriores continuam valendo por cima dela.
+        """
+        if not self._no_elenco(eq, sai, entra):
+            return False, "Selecione os jogadores de 'Sai' e 'Entra' do elenco.", 0.0
+        if int(sai) == int(entra):
+            return False, "Os jogadores de 'Sai' e 'Entra' precisam ser diferentes.", 0.0
+        erro = self._validar_retro(desde, periodo)
+        if erro:
+            return False, erro, 0.0
+        ev = self._evento(
+            "retro", eq, [(int(sai), "banco"), (int(entra), "jogando")],
+            desde=float(desde), sai=int(sai), entra=int(entra), periodo=periodo,
+        )
+        return True, "", self.linha.absoluto(self.tempo()) - ev["abs"]
+
+    def _validar_retro(self, desde, periodo):
+        quando = self.linha.absoluto_em(desde, periodo, self.tempo())
+        if quando is None:
+            return f"O tempo informado não aconteceu no {periodo} até agora — nada a corrigir."
+        if quando >= self.linha.absoluto(self.tempo()):
+            return "O tempo informado é igual ou maior que o tempo atual — nada a corrigir."
+        return None
+
+    # =============== DESFAZER ===============
+    def proximo_desfazer(self):
+        """Rótulo da ação que 'desfazer' reverteria, ou None."""
+        return ROTULOS_ACAO.get(self._niveis[-1][1]) if self._niveis else None
+
+    def proximo_refazer(self):
+        return ROTULOS_ACAO.get(self._refazer[-1][0]) if self._refazer else None
+
+    def desfazer(self):
+        rotulo = self.proximo_desfazer()
+        if rotulo is None:
+            return False, "Nada para desfazer."
+        self._fazer("desfazer", nivel=len(self._niveis))
+        return True, f"Desfeito: {rotulo}."
+
+    def refazer(self):
+        rotulo = self.proximo_refazer()
+        if rotulo is None:
+            return False, "Nada para refazer."
+        self._fazer("refazer", nivel=len(self._refazer))
+        return True, f"Refeito: {rotulo}."
+
+    # =============== CONSULTAS ===============
+    def numeros_por_estado(self, eq, estado):
+        return self.equipes.numeros_por_estado(eq, estado)
+
+    def em_quadra(self, eq, t, periodo):
+        """Quem estava em quadra quando o relógio marcou 't' no período; None se esse instante não houve."""
+        quando = self.linha.absoluto_em(t, periodo, self.tempo())
+        return None if quando is None else self.linha.em_quadra(eq, quando)
+
+    def elenco(self, eq):
+        return self.equipes.numeros_elegiveis(eq)
+
+    def penalidades_ativas(self, eq, agora=None):
+        """2' correndo, com início/fim no relógio exibido (a agenda guarda tempo absoluto)."""
+        agora = self.tempo() if agora is None else agora
+        desvio = self.linha.absoluto(agora) - agora
+        return [
+            dict(p, start=p["start"] - desvio, end=p["end"] - desvio)
+            for p in self.penalidades.ativas(eq, agora + desvio)
+        ]
+
+    def cumprido(self, agora=None):
+        """Segundos de 2' cumpridos por (equipe, número) até o relógio 'agora'."""
+        return self.penalidades.cumprido(self.linha.absoluto(self.tempo() if agora is None else agora))
+
+    # =============== REGISTROS ===============
+    def _fazer(self, acao, **dados):
+        if self._marco:  # primeiro registro da ação: abre o nível de desfazer
+            nome, self._marco = self._marco, ""
+            self._fazer("marco", nome=nome)
+        dados["acao"] = acao
+        self.aplicar(dados)
+        if self.diario is not None:
+            dados = dict(dados)
+            self.diario.anotar(dados.pop("acao"), **dados)
+
+    def _evento(self, tipo, eq=None, mudancas=(), **dados):
+        mudancas = [(int(n), e) for n, e in mudancas]
+        self._fazer("evento", tipo=tipo, t=self.tempo(), equipe=eq, mudancas=mudancas, dados=dados)
+        return self.linha.eventos[-1]
+
+    def _anotar_relogio(self):
+        self._fazer("relogio", iniciado=self.iniciado, cronometro=self.cronometro,
+                    ultimo_tick=self.ultimo_tick, periodo=self.periodo)
+
+    def aplicar(self, r):
+        """Aplica um registro do diário (sem gravá-lo de novo) — usado também na reprodução."""
+        if self._lote is None or r["acao"] in ("marco", "desfazer", "refazer"):
+            getattr(self, "_aplicar_" + r["acao"])(r)
+        if r["acao"] not in ("marco", "desfazer", "refazer"):
+            self.registros.append(r)
+        self.revisao += 1
+
+    def _aplicar_marco(self, r):
+        self._niveis.append((len(self.registros), r["nome"]))
+        self._refazer.clear()  # ação nova depois de desfazer: o que foi desfeito não volta mais
+
+    @staticmethod
+    def _vale(r, pilha):
+        # 'nivel': tamanho da pilha quando o operador apertou o botão. No banco
+        # compartilhado outro operador pode ter mexido nela antes (ordem do seq):
+        # aí o pedido não vale, do mesmo jeito em todas as sessões.
+        return bool(pilha) and r.get("nivel", len(pilha)) == len(pilha)
+
+    def _aplicar_desfazer(self, r):
+        if not self._vale(r, self._niveis):
+            return
+        inicio, nome = self._niveis.pop()
+        self._refazer.append((nome, self.registros[inicio:]))
+        del self.registros[inicio:]
+        if self._lote is None:
+            self._reconstruir()
+        else:
+            self._lote = min(self._lote, inicio)  # refeito uma vez só, no fim de reproduzir()
+
+    def _aplicar_refazer(self, r):
+        if not self._vale(r, self._refazer):
+            return
+        nome, registros = self._refazer.pop()
+        self._niveis.append((len(self.registros), nome))
+        for registro in registros:
+            self.aplicar(registro)
+
+    def reproduzir(self, registros):
+        """Aplica vários registros de uma vez (diário, banco); devolve quantos foram lidos.
+
+        Desfazer/refazer mexem só nas listas e o estado é refeito uma vez no fim:
+        o custo é linear no diário, não uma reconstrução por desfazer.
+        """
+        inicio = self._lote = len(self.registros)
+        n = 0
+        try:
+            for r in registros:
+                self.aplicar(r)
+                n += 1
+        finally:
+            corte, self._lote = self._lote, None
+        if corte < inicio:
+            self._reconstruir()  # o prefixo que o estado refletia foi cortado
+        else:
+            for r in self.registros[inicio:]:
+                getattr(self, "_aplicar_" + r["acao"])(r)
+        return n
+
+    def recomecar(self, registros):
+        """Refaz a partida do zero com 'registros' numa ordem vinda de fora (ex.: o seq do banco compartilhado)."""
+        callbacks, self._callbacks = self._callbacks, []  # alarmes antigos não tocam de novo
+        self.registros, self._niveis, self._refazer = [], [], []
+        self._novo_estado()
+        self.reconstrucoes += 1
+        try:
+            self.reproduzir(registros)
+        finally:
+            self._callbacks = callbacks
+        self.penalidades.avancar(self.linha.absoluto(self.tempo()))
+        for cb in self._callbacks:
+            self.penalidades.ao_vencer(cb)
+
+    def _reconstruir(self):
+        """Estado do zero a partir dos registros vigentes (prefixo que sobrou depois de desfazer)."""
+        self._novo_estado()
+        self.reconstrucoes += 1
+        for r in self.registros:
+            getattr(self, "_aplicar_" + r["acao"])(r)
+        self.penalidades.avancar(self.linha.absoluto(self.tempo()))  # o que já venceu não dispara alarme de novo
+        for cb in self._callbacks:
+            self.penalidades.ao_vencer(cb)
+
+    def _aplicar_equipe(self, r):
+        eq = r["equipe"]
+        self.equipes.definir_equipe(eq, r["numeros"])
+        self.titulares_definidos[eq] = False
+        self.nomes[eq] = r["nome"]
+        self.cores[eq] = r["cor"]
+
+    def _aplicar_cor(self, r):
+        self.cores[r["equipe"]] = r["cor"]
+
+    def _aplicar_evento(self, r):
+        eq = r["equipe"]
+        self.linha.registrar(r["tipo"], r["t"], equipe=eq, mudancas=r["mudancas"], **r["dados"])
+        for numero, _ in r["mudancas"]:
+            # estado final na ordem do tempo: um evento retroativo não passa por cima dos posteriores
+            estado = self.linha.estado(eq, numero)
+            if estado is not None:
+                self.equipes.mudar_estado(eq, numero, estado)
+
+    def _aplicar_elegivel(self, r):
+        for numero in r["numeros"]:
+            self.equipes.definir_elegivel(r["equipe"], numero, r["valor"])
+
+    def _aplicar_titulares_definidos(self, r):
+        self.titulares_definidos[r["equipe"]] = r["valor"]
+
+    def _absoluto(self, r, chave):
+        # diários antigos guardavam o relógio exibido; na reprodução a linha está no mesmo ponto
+        return r[chave] if r.get("absoluto") else self.linha.absoluto(r[chave])
+
+    def _aplicar_penalidade(self, r):
+        self.penalidades.adicionar(r["equipe"], r["numero"], self._absoluto(r, "inicio"),
+                                   consumido=r.get("consumida", False))
+
+    def _aplicar_completou(self, r):
+        self.penalidades.consumir_proxima(r["equipe"], self._absoluto(r, "agora"))
+
+    def _aplicar_relogio(self, r):
+        self.iniciado = r["iniciado"]
+        self.cronometro = r["cronometro"]
+        self.ultimo_tick = r["ultimo_tick"]
+        self.periodo = r["periodo"]
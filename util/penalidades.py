@@ -0,0 +1,138 @@
+# Agenda única de penalidades (2 minutos), ordenada pelo fim em tempo
+# absoluto da partida (util/linha_tempo.py: não volta a zero com 'zerar'). Heaps por equipe separam as que ainda correm das vencidas e não
+# consumidas, então as consultas não dependem do tamanho do histórico: "há
+# vencida?" olha o topo da heap, e a lista ordenada das ativas só é refeita
+# quando a heap muda (não a cada rerun).
+import heapq
+from bisect import bisect_right
+
+DURACAO_2MIN = 120.0
+
+
+class AgendaPenalidades:
+    """Penalidades por equipe: ativas, vencidas (aguardando 'Completou') e histórico."""
+
+    def __init__(self, equipes=("A", "B")):
+        self._historico = {eq: [] for eq in equipes}   # todas, em ordem de registro
+        self._ativas = {eq: [] for eq in equipes}      # heap (fim, id, penalidade)
+        self._vencidas = {eq: [] for eq in equipes}    # heap (fim, id, penalidade), não consumidas
+        self._ordem_ativas = {eq: [] for eq in equipes}  # ativas ordenadas; None = refazer
+        self._callbacks = []
+        self._seq = 0
+        self.versao = 0                                 # muda a cada registro/consumo
+        self._cumprimento = (None, {})                  # (versao, intervalos fundidos por jogador)
+
+    # =============== REGISTRO ===============
+    def adicionar(self, equipe, numero, inicio, duracao=DURACAO_2MIN, tipo="2min", consumido=False):
+        """'consumido': já cumprida e fechada (2' retroativo vencido) — só entra no histórico."""
+        p = {
+            "id": self._seq,
+            "tipo": tipo,
+            "equipe": equipe,
+            "numero": int(numero),
+            "start": float(inicio),
+            "end": float(inicio) + float(duracao),
+            "consumido": bool(consumido),
+        }
+        self._seq += 1
+        self.versao += 1
+        self._historico[equipe].append(p)
+        if not consumido:
+            heapq.heappush(self._ativas[equipe], (p["end"], p["id"], p))
+            self._ordem_ativas[equipe] = None
+        return p
+
+    def ao_vencer(self, callback):
+        """Registra callback(penalidade) chamado uma vez quando a penalidade vence."""
+        self._callbacks.append(callback)
+
+    # =============== RELÓGIO ===============
+    def avancar(self, agora):
+        """Move para 'vencidas' tudo que terminou até 'agora' e dispara os callbacks."""
+        vencidas = []
+        for eq, heap in self._ativas.items():
+            while heap and heap[0][0] <= agora:
+                item = heapq.heappop(heap)
+                heapq.heappush(self._vencidas[eq], item)
+                self._ordem_ativas[eq] = None
+                vencidas.append(item[2])
+        for p in vencidas:
+            for cb in self._callbacks:
+                cb(p)
+        return vencidas
+
+    # =============== CONSULTAS ===============
+    def proxima(self, agora):
+        """Próxima penalidade a vencer (qualquer equipe), ou None."""
+        self.avancar(agora)
+        topos = [h[0] for h in self._ativas.values() if h]
+        return min(topos)[2] if topos else None
+
+    def ativas(self, equipe, agora):
+        """Ativas da equipe pelo fim; a ordenação só é refeita quando a heap mudou."""
+        self.avancar(agora)
+        ordem = self._ordem_ativas[equipe]
+        if ordem is None:
+            ordem = self._ordem_ativas[equipe] = [item[2] for item in sorted(self._ativas[equipe])]
+        return list(ordem)
+
+    def ha_concluidas(self, equipe, agora):
+        """Se há vencida não consumida (topo da heap), sem montar a lista."""
+        self.avancar(agora)
+        return bool(self._vencidas[equipe])
+
+    def concluidas(self, equipe, agora):
+        """Vencidas e ainda não consumidas por um 'Completou', da mais antiga para a mais nova."""
+        self.avancar(agora)
+        return [item[2] for item in sorted(self._vencidas[equipe])]
+
+    def historico(self, equipe):
+        return self._historico.get(equipe, [])
+
+    # =============== TEMPO CUMPRIDO ===============
+    def _intervalos_por_jogador(self):
+        """(equipe, número) -> (inícios, fins, acumulado) dos intervalos fundidos; refeito só quando 'versao' muda."""
+        versao, grupos = self._cumprimento
+        if versao == self.versao:
+            return grupos
+        brutos = {}
+        for eq, lista in self._historico.items():
+            for p in lista:
+                brutos.setdefault((eq, p["numero"]), []).append((p["start"], p["end"]))
+        grupos = {}
+        for chave, intervalos in brutos.items():
+            inicios, fins, acumulado = [], [], [0.0]
+            for a, b in sorted(intervalos):
+                if fins and a <= fins[-1]:  # sobreposto ou encostado: funde
+                    if b > fins[-1]:
+                        acumulado[-1] += b - fins[-1]
+                        fins[-1] = b
+                    continue
+                inicios.append(a)
+                fins.append(b)
+                acumulado.append(acumulado[-1] + (b - a))
+            grupos[chave] = (inicios, fins, acumulado)
+        self._cumprimento = (self.versao, grupos)
+        return grupos
+
+    def cumprido(self, agora):
+        """Segundos de penalidade cumpridos até 'agora' por (equipe, número), sem contar sobreposições."""
+        total = {}
+        for chave, (inicios, fins, acumulado) in self._intervalos_por_jogador().items():
+            k = bisect_right(inicios, agora)
+            seg = acumulado[k]
+            if k and fins[k - 1] > agora:
+                seg -= fins[k - 1] - agora  # intervalo em curso: corta no relógio
+            total[chave] = seg
+        return total
+
+    # =============== COMPLETOU ===============
+    def consumir_proxima(self, equipe, agora):
+        """Consome a vencida mais antiga da equipe (libera a vaga); None se não houver."""
+        self.avancar(agora)
+        if not self._vencidas[equipe]:
+            return None
+        p = heapq.heappop(self._vencidas[equipe])[2]
+        p["consumido"] = True
+        self.versao += 1
+        return p
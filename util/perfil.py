@@ -0,0 +1,101 @@
+# Perfil de rerun (opcional): cronometra as seções de cada execução do script
+# e guarda os últimos N reruns num buffer circular em memória. Desligado, as
+# seções não medem nada — o custo é um teste de flag.
+#
+# Um fragmento que roda sozinho (st.fragment com run_every) não passa pelo
+# topo do script: perfil.fragmento(nome) abre um registro "fragmento:<nome>"
+# para essa execução, e o painel mostra os percentis de cada tipo separados.
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PerfilRerun:
+    """Buffer circular de reruns: {"tipo", "total_ms", <seção>: ms, "contagens": {...}}."""
+
+    def __init__(self, tamanho=200):
+        self.ativo = False
+        self.reruns = deque(maxlen=tamanho)
+        self._atual = None
+        self._t0 = 0.0
+
+    # =============== RERUN ===============
+    def inicio_rerun(self, tipo="completo"):
+        self._atual = {"tipo": tipo, "contagens": {}} if self.ativo else None
+        self._t0 = time.perf_counter()
+
+    def fim_rerun(self, **contagens):
+        if self._atual is None:
+            return
+        self._atual["contagens"].update(contagens)
+        self._atual["total_ms"] = (time.perf_counter() - self._t0) * 1000.0
+        self.reruns.append(self._atual)
+        self._atual = None
+
+    @contextmanager
+    def fragmento(self, nome):
+        """Corpo de um st.fragment: dentro de um rerun completo é uma seção; sozinho, um registro próprio."""
+        if self._atual is not None or not self.ativo:
+            with self.secao(f"fragmento:{nome}"):
+                yield
+            return
+        self.inicio_rerun(f"fragmento:{nome}")
+        try:
+            yield
+        finally:
+            self.fim_rerun()
+
+    # =============== SEÇÕES ===============
+    @contextmanager
+    def secao(self, nome):
+        """Soma o tempo do bloco em 'nome'. Fora de um rerun (ex.: fragmento sozinho) vira um registro próprio."""
+        if not self.ativo:
+            yield
+            return
+        avulso = self._atual is None
+        if avulso:
+            self.inicio_rerun("fragmento")
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            atual = self._atual
+            if atual is not None:
+                atual[nome] = atual.get(nome, 0.0) + (time.perf_counter() - t0) * 1000.0
+            if avulso:
+                self.fim_rerun()
+
+    def contar(self, nome, n=1):
+        if self._atual is not None:
+            self._atual["contagens"][nome] = self._atual["contagens"].get(nome, 0) + n
+
+    # =============== RESUMO ===============
+    def tipos(self):
+        """Tipos de registro no buffer ("completo", "fragmento:<nome>"), completos primeiro."""
+        return sorted({r["tipo"] for r in self.reruns}, key=lambda t: (t != "completo", t))
+
+    def percentis(self, tipo=None):
+        """{seção: {"n", "p50", "p95", "max"}} em ms, sobre o buffer atual (só 'tipo', se dado)."""
+        amostras = {}
+        for r in self.reruns:
+            if tipo is not None and r["tipo"] != tipo:
+                continue
+            for k, v in r.items():
+                if isinstance(v, float):
+                    amostras.setdefault(k, []).append(v)
+            for k, v in r["contagens"].items():
+                amostras.setdefault(f"#{k}", []).append(float(v))
+        resumo = {}
+        for k, vals in amostras.items():
+            vals.sort()
+            resumo[k] = {
+                "n": len(vals),
+                "p50": vals[len(vals) // 2],
+                "p95": vals[min(len(vals) - 1, int(0.95 * len(vals)))],
+                "max": vals[-1],
+            }
+        return resumo
+
+    def exportar_json(self):
+        return json.dumps({"reruns": list(self.reruns), "percentis": self.percentis()}, ensure_ascii=False, indent=1)
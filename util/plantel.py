@@ -0,0 +1,79 @@
+# Plantel indexado por (equipe, número), com conjuntos por estado mantidos em
+# dia a cada mudança — "quem está em quadra / no banco / excluído" sem varrer
+# a lista de jogadores.
+
+EQUIPES = ("A", "B")
+
+def _novo_jogador(numero):
+    return {"numero": int(numero), "estado": "banco", "elegivel": True, "expulso": False, "exclusoes": 0}
+
+
+class Plantel:
+    """Jogadores por equipe + índices por estado e elegibilidade."""
+
+    def __init__(self, equipes=EQUIPES):
+        self._jogadores = {eq: {} for eq in equipes}     # eq -> {numero: jogador} (ordem do cadastro)
+        self._ordem = {eq: {} for eq in equipes}         # eq -> {numero: posição no cadastro}
+        self._estados = {eq: {} for eq in equipes}       # eq -> {estado: {numeros}}
+        self._inelegiveis = {eq: set() for eq in equipes}
+
+    # =============== CADASTRO ===============
+    def definir_equipe(self, eq, numeros):
+        """Substitui o plantel da equipe (números repetidos são ignorados)."""
+        self._jogadores[eq] = {}
+        self._ordem[eq] = {}
+        self._estados[eq] = {}
+        self._inelegiveis[eq] = set()
+        for n in numeros:
+            n = int(n)
+            if n in self._jogadores[eq]:
+                continue
+            self._ordem[eq][n] = len(self._ordem[eq])
+            self._jogadores[eq][n] = _novo_jogador(n)
+            self._estados[eq].setdefault("banco", set()).add(n)
+        return list(self._jogadores[eq])
+
+    # =============== CONSULTAS ===============
+    def jogadores(self, eq):
+        """Dicts dos jogadores na ordem do cadastro (somente leitura de estado/elegível)."""
+        return self._jogadores.get(eq, {}).values()
+
+    def jogador(self, eq, numero):
+        return self._jogadores.get(eq, {}).get(int(numero))
+
+    def esta(self, eq, numero, estado):
+        return int(numero) in self._estados[eq].get(estado, ())
+
+    def elegivel(self, eq, numero):
+        return int(numero) not in self._inelegiveis[eq]
+
+    def numeros_por_estado(self, eq, estado):
+        """Números elegíveis no estado informado, na ordem do cadastro."""
+        nums = self._estados[eq].get(estado, set()) - self._inelegiveis[eq]
+        return sorted(nums, key=self._ordem[eq].__getitem__)
+
+    def numeros_elegiveis(self, eq):
+        inel = self._inelegiveis[eq]
+        return [n for n in self._jogadores[eq] if n not in inel]
+
+    # =============== MUDANÇAS ===============
+    def mudar_estado(self, eq, numero, novo_estado):
+        j = self.jogador(eq, numero)
+        if j is None:
+            return False
+        numero = j["numero"]
+        self._estados[eq].get(j["estado"], set()).discard(numero)
+        self._estados[eq].setdefault(novo_estado, set()).add(numero)
+        j["estado"] = novo_estado
+        return True
+
+    def definir_elegivel(self, eq, numero, elegivel):
+        j = self.jogador(eq, numero)
+        if j is None:
+            return False
+        j["elegivel"] = bool(elegivel)
+        if elegivel:
+            self._inelegiveis[eq].discard(j["numero"])
+        else:
+            self._inelegiveis[eq].add(j["numero"])
+        return True
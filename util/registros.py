@@ -1,17 +1,164 @@
-import pandas as pd
+# Saída dos tempos em CSV: uma partida (salvar_csv) ou uma temporada inteira
+# a partir dos diários gravados em dados/diario (relatorio_temporada). Na
+# temporada, cada diário é reproduzido num processo do pool e devolve só as
+# linhas por jogador; o processo principal soma por jogador/equipe e grava as
+# linhas por partida à medida que chegam — a memória não cresce com o número
+# de partidas. Com --parquet, cada partida também é acrescentada ao dataset
+# particionado de util/exportacao.py. O entrosamento (util/entrosamento.py)
+# vem junto: minutos por escalação e por dupla, somados na temporada.
+#
+#   python -m util.registros dados/diario --saida dados/temporada -j 4
+import argparse
+import csv
 import os
+import sys
+from multiprocessing import Pool
 
-def salvar_csv(state):
-    registros = []
-    for equipe in ["A", "B"]:
-        for jogador in state["equipes"][equipe]:
-            registros.append({
-                "Equipe": equipe,
-                "Jogador": jogador["numero"],
-                "Tempo jogado (min)": round(jogador["tempo_jogado"] / 60, 2),
-                "Tempo no banco (min)": round(jogador["tempo_banco"] / 60, 2),
-                "Tempo 2min (min)": round(jogador["tempo_penalidade"] / 60, 2)
-            })
-    df = pd.DataFrame(registros)
-    os.makedirs("dados", exist_ok=True)
-    df.to_csv("dados/saida_jogo.csv", index=False, encoding="utf-8")
+from util import diario, entrosamento
+from util.motor import Partida
+
+CAMPOS_PARTIDA = (
+    "Partida", "Equipe", "Jogador", "Jogado 1ºT (min)", "Jogado 2ºT (min)",
+    "Banco (min)", "Tempo 2min (min)", "Exclusões", "Expulso",
+)
+_SOMAS = ("jogado_1t", "jogado_2t", "banco", "doismin", "exclusoes", "expulsoes")
+
+
+# =============== UMA PARTIDA ===============
+def linhas_partida(partida, agora=None):
+    """Uma linha por jogador: segundos por coluna, exclusões e expulsão (nome da equipe, não A/B)."""
+    agora = partida.cronometro if agora is None else agora  # parado: a linha do tempo limita ao último evento
+    r = partida.linha.retrato(agora)
+    cumprido = partida.cumprido(agora)
+    linhas = []
+    for eq, num, estado, exc, t in zip(r["equipe"], r["numero"], r["estado"], r["exclusoes"], r["tempos"]):
+        linhas.append({
+            "equipe": partida.nomes[eq],
+            "numero": int(num),
+            "jogado_1t": float(t[0]),
+            "jogado_2t": float(t[1]),
+            "banco": float(t[2]),
+            "doismin": cumprido.get((eq, int(num)), 0.0),
+            "exclusoes": int(exc),
+            "expulsoes": int(estado == "expulso"),
+        })
+    return linhas
+
+def _linha_csv(partida_id, l):
+    return [
+        partida_id, l["equipe"], l["numero"],
+        round(l["jogado_1t"] / 60, 2), round(l["jogado_2t"] / 60, 2),
+        round(l["banco"] / 60, 2), round(l["doismin"] / 60, 2),
+        l["exclusoes"], l["expulsoes"],
+    ]
+
+def salvar_csv(partida, caminho=os.path.join("dados", "saida_jogo.csv")):
+    """Grava os tempos de uma partida (util.motor.Partida) em CSV."""
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(CAMPOS_PARTIDA)
+        for l in linhas_partida(partida, partida.tempo()):
+            w.writerow(_linha_csv("", l))
+
+
+# =============== TEMPORADA ===============
+def _resumir(caminho):
+    """Trabalho de um processo do pool: reproduz o diário e devolve (caminho, linhas, entrosamento, erro)."""
+    try:
+        partida = Partida()
+        diario.reproduzir(partida, caminho)
+        return caminho, linhas_partida(partida), entrosamento.resumo_partida(partida), None
+    except Exception as e:  # diário corrompido não derruba a temporada
+        return caminho, [], {}, f"{type(e).__name__}: {e}"
+
+def _diarios(diretorio):
+    for entrada in os.scandir(diretorio):
+        if entrada.is_file() and entrada.name.endswith(".jsonl"):
+            yield entrada.path
+
+def _somar(totais, chave, l):
+    t = totais.get(chave)
+    if t is None:
+        t = totais[chave] = dict.fromkeys(("jogos",) + _SOMAS, 0)
+    t["jogos"] += 1
+    for k in _SOMAS:
+        t[k] += l[k]
+
+def _gravar_totais(caminho, cabecalho, totais):
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(cabecalho + ["Jogos", "Jogado (min)", "Banco (min)", "Tempo 2min (min)", "Exclusões", "Expulsões"])
+        for chave in sorted(totais, key=str):
+            t = totais[chave]
+            w.writerow(list(chave) + [
+                t["jogos"], round((t["jogado_1t"] + t["jogado_2t"]) / 60, 2), round(t["banco"] / 60, 2),
+                round(t["doismin"] / 60, 2), t["exclusoes"], t["expulsoes"],
+            ])
+
+def _gravar_entrosamento(caminho, cabecalho, tempos):
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["Equipe", cabecalho, "Minutos"])
+        for (equipe, numeros), s in sorted(tempos.items(), key=lambda kv: (kv[0][0], -kv[1])):
+            w.writerow([equipe, " ".join(map(str, numeros)), round(s / 60, 2)])
+
+def relatorio_temporada(diretorio, saida, processos=None, lote=8, parquet=None):
+    """Gera partidas.csv, jogadores.csv, equipes.csv, escalacoes.csv e pares.csv em 'saida'.
+
+    Devolve {"partidas", "erros"}.
+    """
+    if parquet:
+        from util.exportacao import exportar_linhas  # pyarrow só quando pedido
+    os.makedirs(saida, exist_ok=True)
+    jogadores, equipes, erros, n = {}, {}, [], 0
+    escalacoes, duplas = {}, {}  # (equipe, números) -> segundos juntos
+    with open(os.path.join(saida, "partidas.csv"), "w", newline="", encoding="utf-8") as f, \
+            Pool(processos) as pool:
+        w = csv.writer(f)
+        w.writerow(CAMPOS_PARTIDA)
+        for caminho, linhas, quadra, erro in pool.imap_unordered(_resumir, _diarios(diretorio), chunksize=lote):
+            if erro:
+                erros.append((caminho, erro))
+                continue
+            n += 1
+            partida_id = os.path.splitext(os.path.basename(caminho))[0]
+            if parquet:
+                exportar_linhas(partida_id, linhas, parquet)
+            por_equipe = {}
+            for l in linhas:
+                w.writerow(_linha_csv(partida_id, l))
+                _somar(jogadores, (l["equipe"], l["numero"]), l)
+                soma = por_equipe.setdefault(l["equipe"], dict.fromkeys(_SOMAS, 0))
+                for k in _SOMAS:
+                    soma[k] += l[k]
+            for nome, soma in por_equipe.items():
+                _somar(equipes, (nome,), soma)
+            for nome, q in quadra.items():
+                for numeros, s in q["escalacoes"]:
+                    escalacoes[nome, numeros] = escalacoes.get((nome, numeros), 0.0) + s
+                for par, s in q["pares"].items():
+                    duplas[nome, par] = duplas.get((nome, par), 0.0) + s
+    _gravar_totais(os.path.join(saida, "jogadores.csv"), ["Equipe", "Jogador"], jogadores)
+    _gravar_totais(os.path.join(saida, "equipes.csv"), ["Equipe"], equipes)
+    _gravar_entrosamento(os.path.join(saida, "escalacoes.csv"), "Escalação", escalacoes)
+    _gravar_entrosamento(os.path.join(saida, "pares.csv"), "Dupla", duplas)
+    return {"partidas": n, "erros": erros}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Relatório de temporada a partir dos diários das partidas.")
+    ap.add_argument("diretorio", nargs="?", default=diario.DIRETORIO, help="diretório com os diários (.jsonl)")
+    ap.add_argument("--saida", default=os.path.join("dados", "temporada"), help="diretório dos CSVs")
+    ap.add_argument("-j", "--processos", type=int, help="processos do pool (padrão: nº de CPUs)")
+    ap.add_argument("--parquet", help="também acrescenta cada partida ao dataset Parquet neste diretório")
+    args = ap.parse_args(argv)
+
+    r = relatorio_temporada(args.diretorio, args.saida, args.processos, parquet=args.parquet)
+    print(f"{r['partidas']} partida(s) em {args.saida}.")
+    for caminho, erro in r["erros"]:
+        print(f"ignorado {caminho}: {erro}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+# Relatório de tempos por jogador: a tabela sai do retrato colunar da linha
+# do tempo (util/estatisticas.py) numa única passada vetorizada — conversão
+# para minutos, arredondamento e totais por coluna, não por jogador.
+import numpy as np
+import pandas as pd
+
+
+def tabela_tempos(retrato, cumprido, cores):
+    """DataFrame do relatório. 'cumprido': segundos de 2' por (equipe, número); 'cores': equipe -> cor."""
+    if not len(retrato["numero"]):
+        return pd.DataFrame()
+    minutos = retrato["tempos"] / 60.0  # colunas: jogado_1t, jogado_2t, banco, doismin
+    dois_min = np.array([
+        cumprido.get((eq, int(num)), 0.0) for eq, num in zip(retrato["equipe"], retrato["numero"])
+    ]) / 60.0
+    df = pd.DataFrame({
+        "Equipe": retrato["equipe"],
+        "Número": retrato["numero"],
+        "Estado": retrato["estado"],
+        "Exclusões": retrato["exclusoes"],
+        "Jogado 1ºT (min)": minutos[:, 0].round(1),
+        "Jogado 2ºT (min)": minutos[:, 1].round(1),
+        "Jogado Total (min)": (minutos[:, 0] + minutos[:, 1]).round(1),
+        "Banco (min)": minutos[:, 2].round(1),
+        "2 min (min)": dois_min.round(1),
+    })
+    df["CorEquipe"] = df["Equipe"].map(cores).fillna("#333")
+    return df.sort_values(["Equipe", "Número"])
+
+
+def avancar_tabela(df, segundos, periodo, restante_2min):
+    """Tabela de 'segundos' depois: quem está jogando/no banco soma o tempo (vista do espectador).
+
+    O retrato publicado só muda com eventos; entre eles o relógio basta para os
+    minutos. 'restante_2min': (equipe, número) -> segundos que faltavam dos 2'
+    no retrato — o 2' para de contar quando vence, mesmo sem novo retrato.
+    """
+    if df.empty or segundos <= 0:
+        return df
+    df = df.copy()
+    minutos = segundos / 60.0
+    jogando = df["Estado"] == "jogando"
+    jogado = "Jogado 1ºT (min)" if periodo == "1º Tempo" else "Jogado 2ºT (min)"
+    for coluna, linhas in (
+        (jogado, jogando), ("Jogado Total (min)", jogando), ("Banco (min)", df["Estado"] == "banco"),
+    ):
+        df.loc[linhas, coluna] = (df.loc[linhas, coluna] + minutos).round(1)
+    falta = np.array([restante_2min.get((eq, int(n)), 0.0) for eq, n in zip(df["Equipe"], df["Número"])])
+    df["2 min (min)"] = (df["2 min (min)"] + np.minimum(segundos, falta) / 60.0).round(1)
+    return df
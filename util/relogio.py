@@ -0,0 +1,29 @@
+# Relógio do servidor: time.monotonic() ancorado uma vez na hora do sistema.
+# Os valores parecem epoch (diários antigos continuam comparáveis), mas nunca
+# saltam com ajustes do NTP — só avançam. Todos os instantes da partida
+# (início, pausa, fim dos 2') e o componente do cronômetro usam esta base.
+#
+# Sincronia com o cliente (componentes/cronometro): o navegador manda t0 no
+# relógio dele; o servidor devolve quando recebeu e quando respondeu; o
+# cliente calcula atraso e diferença como no NTP e fica com a amostra de
+# menor ida-e-volta.
+import time
+
+_ANCORA = time.time() - time.monotonic()
+
+
+def agora():
+    """Segundos (base epoch) que só avançam, com a resolução do relógio monotônico."""
+    return _ANCORA + time.monotonic()
+
+
+def formato_mmss(segundos):
+    """Leitura do relógio de jogo em MM:SS."""
+    m, s = divmod(int(segundos), 60)
+    return f"{m:02d}:{s:02d}"
+
+
+def resposta_sync(t0, recebido=None):
+    """Resposta ao pedido de sincronia 't0' do cliente. 'recebido': quando o pedido chegou (início do rerun)."""
+    enviado = agora()
+    return {"t0": t0, "recebido": enviado if recebido is None else recebido, "enviado": enviado}